@@ -0,0 +1,108 @@
+# agents.py
+import numpy as np
+
+from config import (ACTIONS, DISCOUNT_FACTOR, EXPLORATION_DECAY, EXPLORATION_RATE,
+                    LEARNING_RATE, MIN_EXPLORATION_RATE, MONSTER_REWARD, Q_DTYPE, START_POS)
+
+
+class AgentSwarm():
+    """Q-learning agents and wandering monsters on one maze, stepped together.
+
+    State is kept as arrays, one slot per agent or monster (struct of
+    arrays): states holds each agent's state id (as in MazeTables), actions
+    and rewards its last move, monsters each monster's state id. step()
+    moves everything with a handful of NumPy operations whatever the
+    number of agents.
+
+    Agents share one Q-table (updated in place, so it can be the game AI's)
+    unless shared=False, in which case q_table has one table per agent.
+    An agent that runs into a monster gets MONSTER_REWARD and, like an agent
+    reaching the goal, restarts at start_pos.
+    """
+
+    def __init__(self, tables, n_agents, n_monsters=0, start_pos=START_POS, q_table=None,
+                 shared=True, exploration_rate=EXPLORATION_RATE, seed=None):
+        self.tables = tables
+        self.rng = np.random.default_rng(seed)
+        self.start_state = tables.state(start_pos)
+        self.exploration_rate = exploration_rate
+
+        if q_table is None:
+            shape = (tables.n_states, len(ACTIONS))
+            q_table = np.zeros(shape if shared else (n_agents,) + shape, dtype=Q_DTYPE)
+        self.q_table = q_table
+        # (tables, state, action) either way; a shared table is one table for everyone
+        self.q = q_table.reshape(-1, tables.n_states, len(ACTIONS))
+        self.table = np.zeros(n_agents, dtype=np.intp) if shared else np.arange(n_agents)
+
+        # Agents
+        self.states = np.full(n_agents, self.start_state, dtype=np.intp)
+        self.actions = np.zeros(n_agents, dtype=np.intp)
+        self.rewards = np.zeros(n_agents, dtype=np.float32)
+        self.arrived = 0  # Agents that have reached the goal so far
+
+        # Monsters spawn on reachable cells away from the start, and never enter it or the goal
+        self.blocked = np.zeros(tables.n_states, dtype=bool)
+        self.blocked[[self.start_state, tables.goal_state]] = True
+        spawn = np.flatnonzero((tables.distance >= 0) & ~self.blocked)
+        spawn = spawn[np.abs(tables.positions(spawn) - start_pos).sum(axis=1) > 3]
+        self.monsters = self.rng.choice(spawn, n_monsters) if len(spawn) else np.zeros(0, dtype=np.intp)
+        self.occupied = np.zeros(tables.n_states, dtype=bool)  # Cells with a monster on them
+        self.occupied[self.monsters] = True
+
+    def positions(self):
+        """Agents' [x, y] as an (n_agents, 2) array"""
+        return self.tables.positions(self.states)
+
+    def monster_positions(self):
+        """Monsters' [x, y] as an (n_monsters, 2) array"""
+        return self.tables.positions(self.monsters)
+
+    def move_monsters(self):
+        """Move every monster one step in a random open direction; returns the cells they touched"""
+        moves = self.tables.next_state[self.monsters]
+        allowed = (moves != self.monsters[:, None]) & ~self.blocked[moves]
+        # Random allowed move per monster: the largest random key among allowed ones
+        keys = np.where(allowed, self.rng.random(moves.shape), -1.0)
+        choice = keys.argmax(axis=1)
+        stuck = ~allowed.any(axis=1)
+        old = self.monsters
+        self.monsters = np.where(stuck, old, moves[np.arange(len(old)), choice])
+
+        self.occupied[old] = False
+        self.occupied[self.monsters] = True
+        # Old cells too, so an agent and monster swapping places still collide
+        touched = self.occupied.copy()
+        touched[old] = True
+        return touched
+
+    def step(self):
+        """Move the monsters, then run one Q-learning step for every agent.
+
+        Returns a boolean array marking the agents that hit a monster.
+        """
+        touched = self.move_monsters()
+        n_agents = len(self.states)
+
+        # Choose actions: explore or exploit, per agent
+        q_now = self.q[self.table, self.states]
+        explore = self.rng.random(n_agents) < self.exploration_rate
+        self.actions = np.where(explore, self.rng.integers(0, len(ACTIONS), n_agents), q_now.argmax(axis=1))
+
+        next_states = self.tables.next_state[self.states, self.actions]
+        hit = touched[next_states]
+        self.rewards = np.where(hit, MONSTER_REWARD, self.tables.reward[self.states, self.actions])
+
+        # Q-update; when agents sharing a table share a (state, action) the last one wins
+        old_q = q_now[np.arange(n_agents), self.actions]
+        next_max_q = self.q[self.table, next_states].max(axis=1)
+        self.q[self.table, self.states, self.actions] = old_q + LEARNING_RATE * (
+            self.rewards + DISCOUNT_FACTOR * next_max_q - old_q)
+
+        # Move; agents on the goal or caught by a monster start over
+        goal = next_states == self.tables.goal_state
+        self.arrived += int(goal.sum())
+        self.states = np.where(goal | hit, self.start_state, next_states)
+
+        self.exploration_rate = max(MIN_EXPLORATION_RATE, self.exploration_rate * EXPLORATION_DECAY)
+        return hit
@@ -0,0 +1,31 @@
+# assets.py
+from functools import lru_cache
+
+import pygame
+
+from config import TEXT_CACHE_SIZE
+
+MENU_FONT = "assets/font.ttf"
+
+
+@lru_cache(maxsize=None)
+def load_image(path, convert=False):
+    """Load an image once; later calls return the same Surface"""
+    image = pygame.image.load(path)
+    return image.convert() if convert else image
+
+
+@lru_cache(maxsize=None)
+def get_font(size, path=MENU_FONT):
+    """Font from the assets folder (the menu font by default), created once per size"""
+    return pygame.font.Font(path, size)
+
+
+@lru_cache(maxsize=TEXT_CACHE_SIZE)
+def render_text(text, size, color, path=MENU_FONT):
+    """Rendered, antialiased text, cached by string, size, color and font.
+
+    Colors must be hashable (a name, "#rrggbb" or a tuple). The least
+    recently used entries are dropped once TEXT_CACHE_SIZE are kept.
+    """
+    return get_font(size, path).render(text, True, color)
@@ -0,0 +1,90 @@
+# batch_train.py
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from config import MAZE_SIZES, PRETRAIN_ENVS, PRETRAIN_STEPS, QTABLE_DIR, START_POS
+from generator import generate_grid
+from maze_tables import MazeTables
+from prefetch import mode_seed
+from qtable_store import QTableStore
+from trainer import greedy_path_length, train_q_table
+
+
+def train_one(size, seed, n_envs=PRETRAIN_ENVS, steps=PRETRAIN_STEPS):
+    """Generate the seeded maze and train on it; runs inside a worker process"""
+    started = time.perf_counter()
+    maze = generate_grid(size, seed=seed)
+    tables = MazeTables(maze, (size - 2, size - 2))
+    q_table = train_q_table(tables, n_envs=n_envs, steps=steps, seed=seed)
+    return {
+        "seed": seed,
+        "size": size,
+        "maze": maze,
+        "q_table": q_table,
+        "updates": n_envs * steps,
+        "seconds": time.perf_counter() - started,
+        "path_length": greedy_path_length(tables, q_table),
+        "optimal_length": tables.optimal_steps(START_POS),
+    }
+
+
+def train_mazes(size, seeds, n_envs=PRETRAIN_ENVS, steps=PRETRAIN_STEPS, workers=None):
+    """Train one Q-table per seeded maze across a pool of worker processes.
+
+    Returns (results, summary): one dict per seed, in seed order, with the
+    maze, its q_table and timing; and totals for the whole batch.
+    """
+    seeds = list(seeds)
+    workers = workers or os.cpu_count()
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(train_one, [size] * len(seeds), seeds,
+                                [n_envs] * len(seeds), [steps] * len(seeds)))
+    wall_seconds = time.perf_counter() - started
+
+    solved = [r for r in results if r["path_length"] is not None]
+    wasted = [r["path_length"] - r["optimal_length"] for r in solved]
+    updates = sum(r["updates"] for r in results)
+    summary = {
+        "mazes": len(results),
+        "workers": workers,
+        "updates": updates,
+        "wall_seconds": wall_seconds,
+        "updates_per_second": updates / wall_seconds,
+        "solved": len(solved),
+        "mean_path_length": sum(r["path_length"] for r in solved) / len(solved) if solved else None,
+        "mean_wasted_steps": sum(wasted) / len(wasted) if wasted else None,
+    }
+    return results, summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-train Q-tables on many mazes in parallel")
+    parser.add_argument("--mode", choices=list(MAZE_SIZES), default="Medium")
+    parser.add_argument("--mazes", type=int, default=32, help="number of mazes to train on")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="base seed, like config.MAZE_SEED; games only use --save tables "
+                             "when MAZE_SEED is set to the same value")
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    parser.add_argument("--envs", type=int, default=PRETRAIN_ENVS)
+    parser.add_argument("--steps", type=int, default=PRETRAIN_STEPS)
+    parser.add_argument("--save", action="store_true", help=f"store tables under {QTABLE_DIR}/")
+    args = parser.parse_args()
+
+    seeds = [mode_seed(args.seed, args.mode, k) for k in range(args.mazes)]
+    results, summary = train_mazes(MAZE_SIZES[args.mode], seeds, args.envs, args.steps, args.workers)
+    if args.save:
+        store = QTableStore(QTABLE_DIR)
+        for result in results:
+            q_table, _ = store.load(result["maze"], args.mode)
+            q_table[:] = result["q_table"]
+            store.save(q_table)
+
+    for key, value in summary.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
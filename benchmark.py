@@ -0,0 +1,177 @@
+# benchmark.py
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pygame
+
+from config import MAZE_SIZES, PLANNING_STEPS, PLANNING_THRESHOLD, Q_DTYPE, START_POS
+from generator import generate_grid, generate_rows
+from maze_tables import MazeTables
+from planner import PrioritizedSweeping
+from trainer import q_step, train_q_table
+
+GENERATE_SIZES = [10, 16, 64, 256, 1024]
+RENDER_MODES = ["Easy", "Medium", "Blackout"]
+
+
+def best_time(func, repeats):
+    """Fastest of repeats runs of func(), in seconds"""
+    best = None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_generate(seed, repeats):
+    """Seconds to generate one maze per size"""
+    results = {}
+    for size in GENERATE_SIZES:
+        seconds = best_time(lambda: generate_grid(size, seed=seed), repeats)
+        results[f"generate/{size}"] = {"value": seconds, "unit": "s", "higher_is_better": False}
+    # Streaming (Eller's) generator, same area as the largest grid
+    size = GENERATE_SIZES[-1]
+    seconds = best_time(lambda: sum(1 for _ in generate_rows(size, size, seed=seed)), repeats)
+    results[f"generate/rows/{size}"] = {"value": seconds, "unit": "s", "higher_is_better": False}
+    return results
+
+
+def bench_learning(seed, repeats, steps=20000):
+    """Q-updates per second: the game's single-agent step and the batch trainer,
+    and game steps per second with Dyna-Q planning after each one"""
+    size = MAZE_SIZES["Medium"]
+    tables = MazeTables(generate_grid(size, seed=seed), (size - 2, size - 2))
+
+    def game_steps(n, plan=False):
+        rng = random.Random(seed)
+        q_table = np.zeros((tables.n_states, 4), dtype=Q_DTYPE)
+        planner = PrioritizedSweeping(tables, q_table, PLANNING_STEPS, PLANNING_THRESHOLD) if plan else None
+        state = start = tables.state(START_POS)
+        for _ in range(n):
+            action, next_state, reward = q_step(tables, q_table, state, 0.1, rng)
+            if planner is not None:
+                planner.observe(state, action, reward, next_state)
+            state = start if next_state == tables.goal_state else next_state
+
+    def batch_steps():
+        train_q_table(tables, n_envs=256, steps=steps // 20, seed=seed)
+
+    plan_steps = steps // 10  # Each step also runs up to PLANNING_STEPS planning updates
+    game = best_time(lambda: game_steps(steps), repeats)
+    batch = best_time(batch_steps, repeats)
+    planned = best_time(lambda: game_steps(plan_steps, plan=True), repeats)
+    return {
+        "learn/game_step": {"value": steps / game, "unit": "updates/s", "higher_is_better": True},
+        "learn/batch_trainer": {"value": 256 * (steps // 20) / batch, "unit": "updates/s", "higher_is_better": True},
+        "learn/planner": {"value": plan_steps / planned, "unit": "steps/s", "higher_is_better": True},
+    }
+
+
+def bench_render(seed, repeats, frames=300):
+    """Milliseconds per rendered game frame in each mode, with the AI moving.
+
+    Only draw_frame() is timed; the AI's moves (and their planning, see
+    learn/planner) happen between frames.
+    """
+    # maze_race expects to run from the repo directory (assets/ paths)
+    os.chdir(os.path.dirname(os.path.abspath(__file__)))
+    import maze_race
+
+    maze_race.setup(headless=True, qtable_dir=tempfile.mkdtemp(prefix="bench-qtables-"))
+    maze_race.PRETRAIN_MODES = []  # Pre-training is measured by bench_learning
+    maze_race.RECORD_MATCHES = False
+    results = {}
+    for mode in RENDER_MODES:
+        def frames_in_mode(full_redraw):
+            """Seconds spent in draw_frame() over frames frames"""
+            random.seed(seed)
+            maze_race.current_mode = mode
+            maze_race.game_over = False
+            maze_race.new_maze(seed=seed)
+            maze_race.redraw_all = True
+            drawing = 0.0
+            for _ in range(frames):
+                maze_race.redraw_all = maze_race.redraw_all or full_redraw
+                maze_race.ai_step()
+                started = time.perf_counter()
+                maze_race.draw_frame()
+                drawing += time.perf_counter() - started
+                pygame.event.pump()
+            return drawing
+
+        for name, full_redraw in (("frame", False), ("full_redraw", True)):
+            seconds = min(frames_in_mode(full_redraw) for _ in range(repeats))
+            results[f"render/{mode}/{name}"] = {"value": 1000 * seconds / frames, "unit": "ms",
+                                               "higher_is_better": False}
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Print each metric against the baseline and return the names that regressed"""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            print(f"{name:32} {result['value']:14.6g} {result['unit']:10} (new)")
+            continue
+        old = baseline[name]["value"]
+        change = (result["value"] - old) / old if old else 0.0
+        worse = -change if result["higher_is_better"] else change
+        flag = "REGRESSION" if worse > tolerance else ""
+        print(f"{name:32} {result['value']:14.6g} {result['unit']:10} {change:+8.1%} {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark maze generation, learning and rendering")
+    parser.add_argument("--only", choices=["generate", "learn", "render"], action="append",
+                        help="run only these groups (repeatable)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=3, help="best of this many runs")
+    parser.add_argument("--output", help="write results JSON here instead of stdout")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="allowed slowdown before a metric counts as a regression")
+    args = parser.parse_args()
+
+    groups = {"generate": bench_generate, "learn": bench_learning, "render": bench_render}
+    results = {}
+    for group, bench in groups.items():
+        if not args.only or group in args.only:
+            results.update(bench(args.seed, args.repeats))
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pygame": pygame.version.ver,
+            "machine": platform.machine(),
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    elif not args.baseline:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.tolerance):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ class Button():
 		self.base_color, self.hovering_color = base_color, hovering_color
 		self.text_input = text_input
 		self.text = self.font.render(self.text_input, True, self.base_color)
+		self.hovering = False
 		if self.image is None:
 			self.image = self.text
 		self.rect = self.image.get_rect(center=(self.x_pos, self.y_pos))
@@ -23,7 +24,8 @@ class Button():
 		return False
 
 	def changeColor(self, position):
-		if position[0] in range(self.rect.left, self.rect.right) and position[1] in range(self.rect.top, self.rect.bottom):
-			self.text = self.font.render(self.text_input, True, self.hovering_color)
-		else:
-			self.text = self.font.render(self.text_input, True, self.base_color)
\ No newline at end of file
+		# Only re-render the text when the hover state flips
+		hovering = self.checkForInput(position)
+		if hovering != self.hovering:
+			self.hovering = hovering
+			self.text = self.font.render(self.text_input, True, self.hovering_color if hovering else self.base_color)
\ No newline at end of file
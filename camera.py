@@ -0,0 +1,54 @@
+# camera.py
+import numpy as np
+import pygame
+
+
+class Camera():
+    """Scrolling view of view_width x view_height tiles onto a larger maze.
+
+    (x, y) is the maze tile shown in the top-left corner. follow() only
+    scrolls when the followed position gets within margin tiles of the
+    view's edge, then re-centres on it, so the view moves in occasional
+    jumps rather than every step.
+    """
+
+    def __init__(self, view_width, view_height, maze_size, margin=2):
+        self.view_width = min(view_width, maze_size)
+        self.view_height = min(view_height, maze_size)
+        self.maze_size = maze_size
+        self.margin = margin
+        self.x = 0
+        self.y = 0
+
+    def follow(self, pos):
+        """Scroll to keep pos away from the view's edges; True if the view moved"""
+        old = (self.x, self.y)
+        self.x = self._axis(self.x, pos[0], self.view_width)
+        self.y = self._axis(self.y, pos[1], self.view_height)
+        return (self.x, self.y) != old
+
+    def _axis(self, start, pos, length):
+        if start + self.margin <= pos < start + length - self.margin:
+            return start
+        return min(max(pos - length // 2, 0), self.maze_size - length)
+
+    def visible(self, pos):
+        """Whether the tile at pos is inside the view"""
+        return (self.x <= pos[0] < self.x + self.view_width
+                and self.y <= pos[1] < self.y + self.view_height)
+
+    def tile_rect(self, pos, tile_size):
+        """Screen rect of the tile at maze position pos"""
+        return pygame.Rect((pos[0] - self.x) * tile_size, (pos[1] - self.y) * tile_size,
+                           tile_size, tile_size)
+
+    def view_rect(self, tile_size):
+        """Screen rect covered by the view"""
+        return pygame.Rect(0, 0, self.view_width * tile_size, self.view_height * tile_size)
+
+
+def render_minimap(maze, size):
+    """Whole maze scaled down to a size x size Surface (walls black, paths white)"""
+    grid = np.asarray(maze, dtype=np.uint8)
+    pixels = np.where(grid.T[:, :, None] == 1, 0, 255).astype(np.uint8).repeat(3, axis=2)
+    return pygame.transform.scale(pygame.surfarray.make_surface(pixels), (size, size))
@@ -1,8 +1,6 @@
 # config.py
-import pygame
-
-# Initialize Pygame (needed for font definitions)
-pygame.init()
+# Plain settings only: importing this must stay cheap and side-effect free
+# (no pygame), since training scripts and worker processes import it too
 
 # Window and tile settings
 TILE_SIZE = 30
@@ -10,6 +8,15 @@ WINDOW_WIDTH = 16 * TILE_SIZE  # 480
 WINDOW_HEIGHT = 18 * TILE_SIZE # 540
 WINDOW_TITLE = "Maze Race: Player vs AI"
 
+# Mazes bigger than the window scroll (camera.py)
+CAMERA_MARGIN = 3    # Tiles from the view's edge at which it re-centres on the player
+MINIMAP = True       # Show a minimap when the maze scrolls (never in Blackout)
+MINIMAP_SIZE = 96    # Pixels
+
+# Blackout fog of war (visibility.py)
+FOG_RADIUS = 1              # Tiles seen around the player, AI and goal (1 = 3x3)
+FOG_LINE_OF_SIGHT = False   # Only see along open corridors, not through walls
+
 # Color definitions
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -18,26 +25,84 @@ RED = (255, 0, 0)     # AI color
 GREEN = (0, 255, 0)   # Goal color
 GRAY = (150, 150, 150)
 YELLOW = (255, 255, 0)
+ORANGE = (255, 140, 0)  # Extra AI agents
+PURPLE = (160, 0, 200)  # Monsters
 
-# Font settings
-FONT = pygame.font.SysFont(None, 20)  # Smaller font for smaller tiles
-WINNER_FONT = pygame.font.SysFont(None, 40)
+# Font settings (pygame's default font, created when the game starts)
+FONT_SIZE = 20  # Smaller font for smaller tiles
+WINNER_FONT_SIZE = 40
+TEXT_CACHE_SIZE = 256  # Rendered menu/HUD strings kept by assets.render_text
 
 # Maze is now generated dynamically using generator.py
+MAZE_SIZES = {"Easy": 10, "Medium": 16, "Blackout": 16}  # Maze size per mode
+MAZE_SEED = None     # Base seed for the session's mazes (None = random)
+PREFETCH_DEPTH = 2   # Mazes kept ready per mode by the background prefetcher
 
 # Initial positions
 START_POS = [1, 1]
 
 # AI Q-learning parameters
 ACTIONS = ["left", "right", "up", "down"]
+ACTION_DELTAS = [(-1, 0), (1, 0), (0, -1), (0, 1)]  # (dx, dy) per action id
 LEARNING_RATE = 0.1
 DISCOUNT_FACTOR = 0.9
 EXPLORATION_RATE = 1.0
 MIN_EXPLORATION_RATE = 0.01
 EXPLORATION_DECAY = 0.995
 
+# AI rewards
+GOAL_REWARD = 100   # Reaching the green box
+WALL_REWARD = -10   # Bumping into a wall
+MOVE_REWARD = -1    # Any other move
+MONSTER_REWARD = -50  # Running into a monster
+REWARD_SHAPING = 0.0  # Weight of distance-to-goal shaping in the rewards (0 = off)
+
+# Extra Q-learning agents on the AI's team (sharing its Q-table) and monsters, per mode (agents.py)
+AI_AGENTS = {"Easy": 0, "Medium": 0, "Blackout": 0}
+MONSTERS = {"Easy": 0, "Medium": 0, "Blackout": 0}
+
+# Chance per step that the AI takes the optimal move instead of its own (difficulty knob)
+ORACLE_RATE = {"Easy": 0.0, "Medium": 0.0, "Blackout": 0.0}
+
+# AI learner per mode: "q_learning" (one update per step) or "prioritized_sweeping"
+# (Dyna-Q: also PLANNING_STEPS updates on remembered moves per step, see planner.py)
+AI_ENGINE = {"Easy": "q_learning", "Medium": "prioritized_sweeping", "Blackout": "prioritized_sweeping"}
+PLANNING_STEPS = 100
+PLANNING_THRESHOLD = 1e-3  # Smallest TD error worth a planning update
+
+# Headless pre-training (trainer.py) run before a match starts
+PRETRAIN_MODES = ["Medium", "Blackout"]
+PRETRAIN_ENVS = 256      # Agents stepped together over the same maze
+PRETRAIN_STEPS = 5000    # Batched steps, so PRETRAIN_ENVS * PRETRAIN_STEPS updates
+
+# Q-values are stored per open cell (see MazeTables) in this dtype;
+# "float16" halves memory again at the cost of precision
+Q_DTYPE = "float32"
+
+# Q-table persistence (qtable_store.py)
+QTABLE_DIR = "qtables"       # Memory-mapped .npy files, one per maze and mode
+QTABLE_WARM_START = False    # Seed new tables from the closest stored maze size
+
 # Button settings
-NEXT_BUTTON = pygame.Rect(WINDOW_WIDTH // 2 - 50, WINDOW_HEIGHT - 85, 100, 30)
-BACK_BUTTON = pygame.Rect(WINDOW_WIDTH // 2 - 50, WINDOW_HEIGHT - 45, 100, 30)
-# Frame rate
-FPS = 10
\ No newline at end of file
+NEXT_BUTTON = (WINDOW_WIDTH // 2 - 50, WINDOW_HEIGHT - 85, 100, 30)  # x, y, width, height
+BACK_BUTTON = (WINDOW_WIDTH // 2 - 50, WINDOW_HEIGHT - 45, 100, 30)
+# Frame rate (rendering and input)
+FPS = 60
+
+# Menus only redraw on input, at most MENU_FPS times a second, or every
+# MENU_IDLE_TIMEOUT ms without any
+MENU_FPS = 30
+MENU_IDLE_TIMEOUT = 500
+
+# AI speed: Q-learning steps per second, independent of FPS
+AI_TICK_RATE = 10
+AI_MAX_TICKS_PER_FRAME = 1000  # Beyond this, time is dropped instead of caught up
+
+# Debug mode (key D) frame timings
+FRAME_TIMING_FRAMES = 240   # Frames kept for the p50/p95/max overlay
+FRAME_TIMING_CSV = None     # Set to a file path to also append every frame there
+
+# Match recording (recorder.py): every episode's moves as a binary log
+RECORD_MATCHES = True
+RECORDING_DIR = "recordings"
+RECORD_CHUNK = 4096   # Records buffered before each write
\ No newline at end of file
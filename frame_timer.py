@@ -0,0 +1,72 @@
+# frame_timer.py
+import csv
+import time
+
+import numpy as np
+
+
+class FrameTimer():
+    """Per-frame timing breakdown kept in a fixed-size ring buffer.
+
+    Call mark(stage) after each stage of a frame; the time since the previous
+    mark is charged to that stage. end_frame() stores the frame's row,
+    overwriting the oldest once capacity frames are kept, and appends it to
+    the CSV file if one is open. Nothing is recorded while disabled.
+    """
+
+    def __init__(self, stages, capacity=240, clock=time.perf_counter):
+        self.stages = list(stages)
+        self.capacity = capacity
+        self.clock = clock
+        self.times = np.zeros((capacity, len(self.stages)))  # Seconds, one row per frame
+        self.current = np.zeros(len(self.stages))
+        self.frames = 0
+        self.enabled = False
+        self.csv_file = None
+        self.csv_writer = None
+        self.last = clock()
+
+    def start(self, csv_path=None):
+        """Start recording, optionally streaming every frame to csv_path"""
+        self.enabled = True
+        self.current[:] = 0
+        self.last = self.clock()
+        if csv_path is not None and self.csv_file is None:
+            self.csv_file = open(csv_path, "a", newline="")
+            self.csv_writer = csv.writer(self.csv_file)
+            if self.csv_file.tell() == 0:
+                self.csv_writer.writerow(["frame"] + [f"{stage}_ms" for stage in self.stages])
+
+    def stop(self):
+        """Stop recording and close the CSV file"""
+        self.enabled = False
+        if self.csv_file is not None:
+            self.csv_file.close()
+            self.csv_file = self.csv_writer = None
+
+    def mark(self, stage):
+        """Charge the time since the last mark to stage"""
+        if not self.enabled:
+            return
+        now = self.clock()
+        self.current[self.stages.index(stage)] += now - self.last
+        self.last = now
+
+    def end_frame(self):
+        """Store the finished frame and start timing the next one"""
+        if not self.enabled:
+            return
+        self.times[self.frames % self.capacity] = self.current
+        if self.csv_writer is not None:
+            self.csv_writer.writerow([self.frames] + [f"{1000 * t:.3f}" for t in self.current])
+        self.frames += 1
+        self.current[:] = 0
+
+    def stats(self):
+        """{stage: (p50, p95, max)} in milliseconds over the frames in the buffer"""
+        kept = self.times[:min(self.frames, self.capacity)] * 1000
+        if len(kept) == 0:
+            return {stage: (0.0, 0.0, 0.0) for stage in self.stages}
+        p50, p95 = np.percentile(kept, [50, 95], axis=0)
+        peak = kept.max(axis=0)
+        return {stage: (p50[i], p95[i], peak[i]) for i, stage in enumerate(self.stages)}
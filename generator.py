@@ -1,48 +1,132 @@
-import random
+from itertools import permutations
 
-def generate_maze(size=10, start=(1, 1), goal=None):
-    """Generate a random maze using depth-first search with backtracking."""
+import numpy as np
+
+
+def generate_grid(size=10, start=(1, 1), goal=None, seed=None):
+    """Generate a random maze as a compact (size, size) numpy.uint8 grid.
+
+    Uses depth-first search with backtracking, driven by an explicit stack so
+    any size works without hitting Python's recursion limit. Walls are 1 and
+    paths are 0; index it as grid[y, x]. Pass a seed for a reproducible maze.
+    """
     # Set goal to bottom-right corner if not specified
     if goal is None:
         goal = (size - 2, size - 2)
-    
-    # Initialize maze with walls (1)
-    maze = [[1 for _ in range(size)] for _ in range(size)]
-    
+
+    # Carve into a flat bytearray with a 2-cell ring of paths (0) around the
+    # maze, so a 2-cell jump off the edge is never carvable and needs no
+    # bounds check
+    width = size + 4
+    cells = bytearray(width * width)
+    row = b"\x00\x00" + b"\x01" * size + b"\x00\x00"
+    for y in range(size):
+        cells[(y + 2) * width:(y + 3) * width] = row
+
+    def index(pos):
+        return (pos[1] + 2) * width + pos[0] + 2
+
     # Set start and goal as paths (0)
-    maze[start[1]][start[0]] = 0
-    maze[goal[1]][goal[0]] = 0
-    
-    def is_valid(x, y):
-        """Check if (x, y) is within bounds and is a wall."""
-        return 0 <= x < size and 0 <= y < size and maze[y][x] == 1
-    
-    def get_neighbors(x, y):
-        """Get valid neighbors for carving paths, ensuring 2-cell jumps."""
-        neighbors = []
-        directions = [(0, -2), (0, 2), (-2, 0), (2, 0)]  # Up, down, left, right
-        random.shuffle(directions)
-        for dx, dy in directions:
-            nx, ny = x + dx, y + dy
-            if is_valid(nx, ny):
-                neighbors.append((nx, ny))
-        return neighbors
-    
-    def carve_path(x, y):
-        """Recursively carve paths from (x, y)."""
-        maze[y][x] = 0  # Mark current cell as path
-        for nx, ny in get_neighbors(x, y):
-            if maze[ny][nx] == 1:  # If neighbor is a wall
-                # Carve intermediate cell (the cell between current and neighbor)
-                mid_x, mid_y = (x + nx) // 2, (y + ny) // 2
-                maze[mid_y][mid_x] = 0
-                carve_path(nx, ny)
-    
-    # Start carving from the start position
-    carve_path(start[0], start[1])
-    
+    cells[index(start)] = 0
+    cells[index(goal)] = 0
+
+    # Every ordering of the 2-cell jumps (up, down, left, right); each carved
+    # cell draws one up front, like the shuffle in the old recursive version
+    orders = list(permutations((-2 * width, 2 * width, -2, 2)))
+    draws = ((size + 1) // 2) ** 2 + 1
+    rng = np.random.default_rng(seed)
+    next_order = iter(rng.integers(0, len(orders), draws, dtype=np.uint8).tobytes()).__next__
+
+    # Stack entries are (cell, iterator over the jumps still to try)
+    stack = [(index(start), iter(orders[next_order()]))]
+    push, pop = stack.append, stack.pop
+    while stack:
+        cell, jumps = stack[-1]
+        for jump in jumps:
+            neighbor = cell + jump
+            if cells[neighbor]:  # If neighbor is a wall
+                # Carve it and the intermediate cell
+                cells[neighbor] = 0
+                cells[cell + jump // 2] = 0
+                push((neighbor, iter(orders[next_order()])))
+                break
+        else:
+            pop()
+
     # Ensure goal is connected (in case DFS doesn't reach it)
-    if maze[goal[1]][goal[0]] != 0:
-        maze[goal[1]][goal[0]] = 0
-    
-    return maze
\ No newline at end of file
+    cells[index(goal)] = 0
+
+    grid = np.frombuffer(cells, dtype=np.uint8).reshape(width, width)
+    return np.ascontiguousarray(grid[2:-2, 2:-2])
+
+
+def generate_rows(width=10, height=None, seed=None):
+    """Yield a random maze one row at a time, as numpy.uint8 arrays of length width.
+
+    Uses Eller's algorithm, which only keeps the current row of cells and
+    the set each one belongs to, so memory stays proportional to width
+    however many rows are taken. Rows are laid out like generate_grid's: a
+    wall row on top, then path cells at odd x and y joined through the walls
+    between them. With height=None the maze never ends (take rows with
+    itertools.islice); otherwise exactly height rows come out and the last
+    row of cells joins every remaining set, so the maze is perfect. Pass a
+    seed for a reproducible maze.
+    """
+    rng = np.random.default_rng(seed)
+    xs = np.arange(1, width, 2)  # Cell columns
+    n = len(xs)
+    labels = np.zeros(n, dtype=np.int64)  # Set of each cell, 0 = none yet
+    next_label = 1
+
+    yield np.ones(width, dtype=np.uint8)
+    y = 1
+    while height is None or y < height:
+        # Cells not joined from above start sets of their own
+        fresh = np.flatnonzero(labels == 0)
+        labels[fresh] = np.arange(next_label, next_label + len(fresh))
+        next_label += len(fresh)
+        last = height is not None and y + 2 >= height
+
+        # Join neighbors in different sets at random (all of them on the last row)
+        row = np.ones(width, dtype=np.uint8)
+        row[xs] = 0
+        join = np.ones(n - 1, dtype=bool) if last else rng.random(n - 1) < 0.5
+        parent = {}  # Merged sets, union-find over labels
+
+        def find(label):
+            while label in parent:
+                label = parent[label]
+            return label
+
+        for i in np.flatnonzero(join):
+            a, b = find(int(labels[i])), find(int(labels[i + 1]))
+            if a != b:
+                parent[b] = a
+                row[xs[i] + 1] = 0
+        labels = np.array([find(label) for label in labels.tolist()], dtype=np.int64)
+        yield row
+        y += 1
+
+        if last:
+            if y < height:
+                yield np.ones(width, dtype=np.uint8)
+            return
+
+        # Carve down from random cells, at least one per set so none is cut off
+        down = rng.random(n) < 0.5
+        order = rng.permutation(n)
+        _, first = np.unique(labels[order], return_index=True)
+        down[order[first]] = True
+        below = np.ones(width, dtype=np.uint8)
+        below[xs[down]] = 0
+        labels = np.where(down, labels, 0)
+        yield below
+        y += 1
+
+
+def generate_maze(size=10, start=(1, 1), goal=None, seed=None):
+    """Generate a random maze as nested lists, maze[y][x] (1 = wall, 0 = path).
+
+    List-of-lists view of generate_grid, kept for maze_race.py.
+    """
+    return generate_grid(size, start, goal, seed).tolist()
@@ -1,34 +1,47 @@
 # maze_race.py
 from button import Button
 from pygame.locals import *
+import os
 import sys
 import pygame
 import numpy as np
-import random
 import time
 from config import *  # Import all settings from config.py
-from generator import generate_maze  # Import maze generator
-
-# Set up display
-screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
-pygame.display.set_caption(WINDOW_TITLE)
-
-# Game state variables
+from trainer import q_step  # Q-learning
+from agents import AgentSwarm  # Extra AI agents and monsters
+from prefetch import MazePrefetcher, open_stored, prepare_maze  # Background maze preparation
+from planner import PrioritizedSweeping  # Dyna-Q planning
+from recorder import AI, PLAYER, RESET, TrajectoryWriter  # Binary match logs
+from camera import Camera, render_minimap  # Scrolling view for big mazes
+from visibility import Visibility  # Blackout fog of war
+from qtable_store import QTableStore  # Persistent Q-tables
+from scheduler import FixedTimestep  # Fixed-rate AI ticks
+from frame_timer import FrameTimer  # Debug-mode frame timings
+from assets import get_font, load_image, render_text  # Cached images, fonts and text
+from scenes import EXIT, Scene, SceneManager  # Menu/match screens, one main loop
+
+# Display, fonts and background workers; created by setup(), so importing
+# this module opens no window and starts nothing
+screen = None
+FONT = None
+QUITBUTTON = None  # Stays None in headless mode
+qtable_store = None
+prefetcher = None
+
+# Game state variables, filled in by new_maze()
 maze_size = 10
-#Quit Button design
-QUITBUTTON = Button (
-    image=pygame.image.load("assets/QuitRect.png"),
-    pos=(WINDOW_WIDTH - 80, WINDOW_HEIGHT - 40),
-    text_input="QUIT",
-    font=FONT,
-    base_color=WHITE,
-    hovering_color=RED
-)
-
-maze = generate_maze(size=maze_size)
+maze = None
 player_pos = START_POS.copy()  # [1, 1]
 ai_pos = START_POS.copy()      # [1, 1]
+ai_steps = 0                   # AI moves this episode, including wall bumps
+planner = None                 # Planning engine for AI_ENGINE modes that use one
+recorder = None                # Log of this episode's moves, if RECORD_MATCHES
+swarm = None                   # Extra AI agents and monsters for this maze
+
+# Arrow keys as action ids (indexes into ACTIONS)
+KEY_ACTIONS = {pygame.K_LEFT: 0, pygame.K_RIGHT: 1, pygame.K_UP: 2, pygame.K_DOWN: 3}
 goal_pos = [maze_size - 2, maze_size - 2]  # [8, 8] for 10x10
+tables = None
 current_mode = "Easy"  # Default mode
 start_time = None      # Timer starts when first move is made
 elapsed_time = 0
@@ -36,389 +49,616 @@ game_over = False
 winner = None          # Will store "Player" or "AI" when someone reaches green box
 debug_mode = False
 
-# Setup
-q_table = np.zeros((maze_size, maze_size, len(ACTIONS)))
+q_table = None
 episodes = 0
 
 # Main game loop setup
-running = True
 clock = pygame.time.Clock()
+ai_clock = FixedTimestep(AI_TICK_RATE, AI_MAX_TICKS_PER_FRAME)  # AI steps, independent of FPS
+frame_timer = FrameTimer(["events", "ai", "maze", "overlay", "display"], FRAME_TIMING_FRAMES)
 exploration_rate = EXPLORATION_RATE  # Initial value from config
 
-# Reward function for AI
-def get_reward(pos):
-    """Calculate reward for AI's position"""
-    if pos == goal_pos:  # Reaching green box gives big reward
-        return 100
-    elif maze[pos[1]][pos[0]] == 1:  # Hitting wall is bad
-        return -10
-    else:  # Regular move
-        return -1
-
-# Calculate next position based on action
-def get_next_pos(pos, action):
-    """Get next position based on current position and action"""
-    new_pos = pos.copy()
-    if action == "left" and new_pos[0] > 0:
-        new_pos[0] -= 1
-    elif action == "right" and new_pos[0] < maze_size - 1:
-        new_pos[0] += 1
-    elif action == "up" and new_pos[1] > 0:
-        new_pos[1] -= 1
-    elif action == "down" and new_pos[1] < maze_size - 1:
-        new_pos[1] += 1
-    return new_pos
-
-def game_loop():
-    global running, game_over, exploration_rate, ai_pos, maze, start_time
-    global player_pos, elapsed_time, episodes, maze_size, goal_pos, q_table, winner
-    global debug_mode
-
-    while running:
+# Rendering caches
+maze_layer = None   # Walls of the current maze, rendered once per maze
+background = None   # What the screen looks like under the player, AI and text
+fog = None          # Blackout background, rebuilt from visibility when None
+visibility = None   # Blackout's visible tiles, for the current maze
+camera = None       # View onto the maze, follows the player on mazes bigger than the window
+minimap = None      # Scaled-down maze, only when the camera scrolls
+dirty_rects = []    # Screen areas drawn over last frame
+redraw_all = True   # Blit the whole background and flip on the next frame
+
+# Set up a fresh maze, positions and Q-table for the current mode
+def new_maze(seed=None):
+    """Switch to the next prepared maze for the current mode and reset positions and the AI's Q-table
+
+    Mazes come ready-made from the background prefetcher; pass a seed to
+    build that specific maze right here instead.
+    """
+    global maze, maze_size, player_pos, ai_pos, goal_pos, tables, q_table, exploration_rate
+    global maze_layer, ai_steps, planner, recorder, swarm, visibility
+    if seed is None:
+        prepared = prefetcher.get(current_mode)
+    else:
+        prepared = prepare_maze(current_mode, seed, pretrain=current_mode in PRETRAIN_MODES, store=qtable_store)
+    prepared = open_stored(prepared, qtable_store, QTABLE_WARM_START)  # Only mazes played get stored
+    maze = prepared.maze
+    maze_size = len(maze)
+    player_pos = START_POS.copy()
+    ai_pos = START_POS.copy()
+    ai_steps = 0
+    goal_pos = prepared.goal_pos
+    tables = prepared.tables  # Built with every new maze
+    maze_layer = None
+    qtable_store.save(q_table)
+    q_table = prepared.q_table  # Opened from qtable_store by open_stored
+    # An AI already trained on this maze starts out exploiting; any other starts exploring
+    exploration_rate = MIN_EXPLORATION_RATE if prepared.pretrained else EXPLORATION_RATE
+    if AI_ENGINE[current_mode] == "prioritized_sweeping":
+        planner = PrioritizedSweeping(tables, q_table, PLANNING_STEPS, PLANNING_THRESHOLD)
+    else:
+        planner = None
+    if current_mode == "Blackout":
+        visibility = Visibility(maze, FOG_RADIUS, FOG_LINE_OF_SIGHT)
+    # Extra agents learn into the AI's Q-table
+    swarm = AgentSwarm(tables, AI_AGENTS[current_mode], MONSTERS[current_mode], q_table=q_table,
+                       exploration_rate=exploration_rate, seed=prepared.seed)
+    if recorder is not None:
+        recorder.close()
+        recorder = None
+    if RECORD_MATCHES:
+        os.makedirs(RECORDING_DIR, exist_ok=True)
+        path = os.path.join(RECORDING_DIR, f"{current_mode}-{prepared.seed}-{int(time.time())}.mzt")
+        recorder = TrajectoryWriter(path, maze, START_POS, goal_pos, RECORD_CHUNK)
+    ai_clock.reset()  # Time spent waiting for the maze doesn't count
+
+# Start pygame, open the window and start background work
+def setup(headless=False, qtable_dir=QTABLE_DIR):
+    """Initialize pygame and everything the game needs before new_maze()
+
+    Headless runs on SDL's dummy video and audio drivers and loads nothing
+    from assets/ (so no quit button and no menus), for benchmarks, tests
+    and training scripts that drive new_maze(), ai_step() and draw_frame().
+    """
+    global screen, FONT, QUITBUTTON, qtable_store, prefetcher
+    if headless:
+        os.environ["SDL_VIDEODRIVER"] = "dummy"
+        os.environ["SDL_AUDIODRIVER"] = "dummy"
+    pygame.init()
+
+    # Set up display
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    pygame.display.set_caption(WINDOW_TITLE)
+    FONT = get_font(FONT_SIZE, None)
+
+    #Quit Button design
+    if not headless:
+        QUITBUTTON = Button (
+            image=load_image("assets/QuitRect.png"),
+            pos=(WINDOW_WIDTH - 80, WINDOW_HEIGHT - 40),
+            text_input="QUIT",
+            font=FONT,
+            base_color=WHITE,
+            hovering_color=RED
+        )
+
+    qtable_store = QTableStore(qtable_dir)
+    prefetcher = MazePrefetcher(PREFETCH_DEPTH, MAZE_SEED, qtable_store)
+
+# Shut down background work and the window, then exit
+def quit_game():
+    """Stop the maze prefetcher, close the match log and pygame, and exit"""
+    if prefetcher is not None:
+        prefetcher.close()
+    if recorder is not None:
+        recorder.close()
+    pygame.quit()
+    sys.exit()
+
+# One AI step: choose an action, update the Q-table and move
+def ai_step():
+    """Run one Q-learning step for the AI"""
+    global ai_pos, ai_steps, exploration_rate, start_time
+
+    # Choose an action, update the Q-table, then move
+    state = tables.state(ai_pos)
+    action, next_state, reward = q_step(tables, q_table, state, exploration_rate,
+                                        oracle_rate=ORACLE_RATE[current_mode], monsters=swarm.occupied)
+    caught = swarm.occupied[next_state]
+    landed = tables.state(START_POS) if caught else next_state  # Where the AI really ends up
+    if planner is not None:
+        planner.observe(state, action, reward, landed)
+    if recorder is not None:
+        recorder.write(AI, state, action, reward, landed)
+    ai_steps += 1
+
+    if caught:  # Caught by a monster: back to the start
+        ai_pos = START_POS.copy()
+    elif next_state != state:  # Walls leave the AI where it is
+        ai_pos = tables.pos(next_state)
+        if start_time is None:  # Start timer on first move
+            start_time = time.time()
+
+    # Decay exploration rate
+    exploration_rate = max(MIN_EXPLORATION_RATE, exploration_rate * EXPLORATION_DECAY)
+
+# A monster landed on the player or AI
+def send_to_start(agent, pos):
+    """Log agent (PLAYER or AI) being sent from pos back to the start, and return the start"""
+    if recorder is not None:
+        recorder.write(agent, tables.state(pos), RESET, MONSTER_REWARD, tables.state(START_POS))
+    return START_POS.copy()
+
+# Pre-render the static walls and border of the part of the maze in view
+def render_maze_layer(tile_size):
+    """Render the walls and border inside the camera's view onto a window-sized Surface"""
+    layer = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert()
+    layer.fill(WHITE)
+    # Only tiles inside the view, so the cost doesn't grow with the maze
+    for y in range(camera.y, camera.y + camera.view_height):
+        row = maze[y]
+        for x in range(camera.x, camera.x + camera.view_width):
+            if row[x] == 1:
+                layer.fill(BLACK, ((x - camera.x) * tile_size, (y - camera.y) * tile_size, tile_size, tile_size))
+
+    # Draw border around maze - Alex
+    maze_pixel_size = maze_size * tile_size
+    pygame.draw.rect(layer, BLACK, (-camera.x * tile_size, -camera.y * tile_size, maze_pixel_size, maze_pixel_size), 4)
+    return layer
+
+# Blackout background: the maze layer shows through the tiles in visibility.mask only
+def render_fog(fog, layer, tile_size, boxes):
+    """Redraw the Blackout background inside the changed tile boxes and return it with the screen rects that changed
+
+    With fog None, builds it for the whole view instead.
+    """
+    if fog is None:
+        fog = layer.copy()
+        boxes = [(camera.x, camera.y, camera.x + camera.view_width, camera.y + camera.view_height)]
+
+    changed = []
+    for x0, y0, x1, y1 in boxes:
+        # Only the part of the box in view
+        x0, y0 = max(x0, camera.x), max(y0, camera.y)
+        x1, y1 = min(x1, camera.x + camera.view_width), min(y1, camera.y + camera.view_height)
+        if x0 >= x1 or y0 >= y1:
+            continue
+        rect = camera.tile_rect((x0, y0), tile_size)
+        rect.size = ((x1 - x0) * tile_size, (y1 - y0) * tile_size)
+        fog.fill(BLACK, rect)
+        # Reopen each row's runs of visible tiles with one blit apiece
+        for y in range(y0, y1):
+            row = visibility.mask[y, x0:x1]
+            edges = np.flatnonzero(np.diff(np.concatenate(([False], row, [False]))))
+            for start, end in zip(edges[::2], edges[1::2]):
+                run = camera.tile_rect((x0 + start, y), tile_size)
+                run.width = (end - start) * tile_size
+                fog.blit(layer, run, run)
+        changed.append(rect)
+    return fog, changed
+
+# Draw game elements
+def draw_frame():
+    """Draw the current game state and push the changed areas to the display"""
+    global maze_layer, background, fog, dirty_rects, redraw_all, camera, minimap
+
+    #Stretch out the maze if in Easy to fill screen - Alex
+    bottom_margin = 60
+    if current_mode == "Easy":
+        draw_tile_size = min(WINDOW_WIDTH // maze_size, (WINDOW_HEIGHT - bottom_margin) // maze_size)
+    else:
+        draw_tile_size = TILE_SIZE
+
+    # New maze: fit a camera to the window, and a minimap if the maze doesn't fit
+    if maze_layer is None:
+        camera = Camera(WINDOW_WIDTH // draw_tile_size, (WINDOW_HEIGHT - bottom_margin) // draw_tile_size,
+                        maze_size, CAMERA_MARGIN)
+        camera.follow(player_pos)
+        scrolls = camera.view_width < maze_size or camera.view_height < maze_size
+        # No minimap in Blackout, it would give the maze away
+        minimap = render_minimap(maze, MINIMAP_SIZE) if MINIMAP and scrolls and current_mode != "Blackout" else None
+
+    # Walls only change with the maze or the view, so render them only then
+    if camera.follow(player_pos) or maze_layer is None:
+        maze_layer = render_maze_layer(draw_tile_size)
+        background = maze_layer
+        fog = None
+        redraw_all = True
+
+    # Blackout mode: only tiles near the player, AI, and goal are visible,
+    # so the background only changes around whichever of them moved
+    restored = dirty_rects
+    if current_mode == "Blackout":
+        boxes = visibility.update((player_pos, ai_pos, goal_pos))
+        if fog is None or boxes:
+            fog, changed = render_fog(fog, maze_layer, draw_tile_size, boxes)
+            background = fog
+            restored = restored + changed
+
+    if game_over and not redraw_all:
+        # Victory screen is already up and nothing on it changes
+        return
+
+    # Put the background back under everything drawn last frame
+    if redraw_all:
+        screen.blit(background, (0, 0))
+    else:
+        for rect in restored:
+            screen.blit(background, rect, rect)
+    dirty_rects = []
+    frame_timer.mark("maze")
+
+    # Draw extra AI agents (orange) and monsters (purple) when in view
+    for positions, color in ((swarm.positions(), ORANGE), (swarm.monster_positions(), PURPLE)):
+        for pos in positions:
+            if camera.visible(pos):
+                dirty_rects.append(screen.fill(color, camera.tile_rect(pos, draw_tile_size)))
+
+    # Draw goal (green box), player (blue), and AI (red) when in view
+    for pos, color in ((goal_pos, GREEN), (player_pos, BLUE), (ai_pos, RED)):
+        if camera.visible(pos):
+            dirty_rects.append(screen.fill(color, camera.tile_rect(pos, draw_tile_size)))
+
+    # Minimap: whole maze, the view, and where the player and AI are
+    if minimap is not None:
+        minimap_rect = screen.blit(minimap, (WINDOW_WIDTH - MINIMAP_SIZE - 10, 10))
+        scale = MINIMAP_SIZE / maze_size
+        pygame.draw.rect(screen, GRAY, (minimap_rect.x + camera.x * scale, minimap_rect.y + camera.y * scale,
+                                        camera.view_width * scale, camera.view_height * scale), 1)
+        for pos, color in ((goal_pos, GREEN), (player_pos, BLUE), (ai_pos, RED)):
+            screen.fill(color, (minimap_rect.x + pos[0] * scale, minimap_rect.y + pos[1] * scale, 3, 3))
+        dirty_rects.append(minimap_rect)
+
+    #Draw Debug Info when Enabled
+    if debug_mode:
+        #Show Player position, AI position, and Steps with episode number
+        playerPos = FONT.render(f"Player: {player_pos}", True, RED)
+        aiPos = FONT.render(f"AI: {ai_pos}", True, RED)
+        steps = FONT.render(f"Steps (Episode {episodes+1}): {elapsed_time:.2f}s", True, RED)
+
+        dirty_rects.append(screen.blit(playerPos, (WINDOW_WIDTH - 200, 10)))
+        dirty_rects.append(screen.blit(aiPos, (WINDOW_WIDTH - 200, 30)))
+        dirty_rects.append(screen.blit(steps, (WINDOW_WIDTH - 200, 50)))
+
+        #Show AI steps against the shortest path from the start
+        aiSteps = FONT.render(f"AI steps: {ai_steps} (best {tables.optimal_steps(START_POS)})", True, RED)
+        dirty_rects.append(screen.blit(aiSteps, (WINDOW_WIDTH - 200, 70)))
+
+        #Draw blue box around goal
+        if camera.visible(goal_pos):
+            dirty_rects.append(pygame.draw.rect(screen, BLUE, camera.tile_rect(goal_pos, draw_tile_size), 2))
+
+        #Show frame timings per stage: p50/p95/max in ms
+        for i, (stage, (p50, p95, peak)) in enumerate(frame_timer.stats().items()):
+            timing = FONT.render(f"{stage}: {p50:.1f}/{p95:.1f}/{peak:.1f} ms", True, RED)
+            dirty_rects.append(screen.blit(timing, (WINDOW_WIDTH - 200, 90 + 20 * i)))
+
+    # Display timer and episode number
+    if not game_over and QUITBUTTON is not None:
+        QUITBUTTON.changeColor(pygame.mouse.get_pos())
+        QUITBUTTON.update(screen)
+        dirty_rects.append(QUITBUTTON.rect.union(QUITBUTTON.text_rect))
+    
+    timer_text = FONT.render(f"Time: {elapsed_time:.2f}s", True, BLACK)
+    dirty_rects.append(screen.blit(timer_text, (10, WINDOW_HEIGHT - 40)))
+    maze_text = render_text(f"Episode {episodes + 1}", FONT_SIZE, BLACK, None)
+    dirty_rects.append(screen.blit(maze_text, (10, 10)))
+
+    # Victory screen when someone wins
+    if game_over:
+        # Draw semi-transparent overlay
+        overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+        overlay.set_alpha(128)
+        overlay.fill(GRAY)
+        screen.blit(overlay, (0, 0))
+
+        # Display winner - emphasize green box as win condition
+        winner_color = BLUE if winner == "Player" else RED
+        winner_text = render_text(f"{winner} Reached", WINNER_FONT_SIZE, winner_color, None)
+        goal_text = render_text("the Green Box First!", FONT_SIZE, GREEN, None)
+        time_text = render_text(f"Time: {elapsed_time:.2f}s", FONT_SIZE, WHITE, None)
+        
+        winner_rect = winner_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 60))
+        goal_rect = goal_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
+        time_rect = time_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 60))
+        
+        screen.blit(winner_text, winner_rect)
+        screen.blit(goal_text, goal_rect)
+        screen.blit(time_text, time_rect)
+
+        # Draw Next button
+        pygame.draw.rect(screen, YELLOW, NEXT_BUTTON)
+        next_text = render_text("Next", FONT_SIZE, BLACK, None)
+        next_rect = next_text.get_rect(center=pygame.Rect(NEXT_BUTTON).center)
+        screen.blit(next_text, next_rect)
+
+        # Draw Back button
+        pygame.draw.rect(screen, BLACK, BACK_BUTTON)
+        back_text = render_text("Back", FONT_SIZE, WHITE, None)
+        back_rect = next_text.get_rect(center=pygame.Rect(BACK_BUTTON).center)
+        screen.blit(back_text, back_rect)
+
+    # Push only what changed to the display
+    frame_timer.mark("overlay")
+    if redraw_all:
+        pygame.display.flip()
+        redraw_all = False
+    else:
+        pygame.display.update(restored + dirty_rects)
+
+class GameScene(Scene):
+    """The match: player vs AI on the current maze"""
+
+    @property
+    def idle(self):
+        # Nothing moves on the victory screen
+        return game_over
+
+    def enter(self):
+        global redraw_all
+        redraw_all = True
+
+    def tick(self, clock):
+        clock.tick(FPS)  # Control frame rate
+        frame_timer.mark("display")
+        frame_timer.end_frame()
+
+    def frame(self, events):
+        global game_over, exploration_rate, ai_pos, maze, start_time
+        global player_pos, elapsed_time, episodes, maze_size, goal_pos, q_table, winner
+        global debug_mode, redraw_all
+
         # Handle events
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
-                running = False
-                pygame.quit()
-                sys.exit()
-            
+                return EXIT
 
             #DEBUG MODE
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_d:
                     debug_mode = not debug_mode 
+                    redraw_all = True
+                    if debug_mode:
+                        frame_timer.start(FRAME_TIMING_CSV)
+                    else:
+                        frame_timer.stop()
                     print(f"Debug Mode {'ON' if debug_mode else 'OFF'}")
 
             #QUIT BUTTON
             if not game_over and event.type == pygame.MOUSEBUTTONDOWN:
-                if QUITBUTTON.checkForInput(pygame.mouse.get_pos()):
-                    main_menu()
+                if QUITBUTTON is not None and QUITBUTTON.checkForInput(pygame.mouse.get_pos()):
+                    return "main_menu"
         
-            # Player movement (arrow keys)
-            if not game_over and event.type == pygame.KEYDOWN:
-                new_pos = player_pos.copy()
-                if event.key == pygame.K_LEFT and new_pos[0] > 0:
-                    new_pos[0] -= 1
-                elif event.key == pygame.K_RIGHT and new_pos[0] < maze_size - 1:
-                    new_pos[0] += 1
-                elif event.key == pygame.K_UP and new_pos[1] > 0:
-                    new_pos[1] -= 1
-                elif event.key == pygame.K_DOWN and new_pos[1] < maze_size - 1:
-                    new_pos[1] += 1
-                if maze[new_pos[1]][new_pos[0]] == 0:  # Only move if not a wall
-                    player_pos = new_pos
+            # Player movement (arrow keys), through the same tables as the AI
+            if not game_over and event.type == pygame.KEYDOWN and event.key in KEY_ACTIONS:
+                action = KEY_ACTIONS[event.key]
+                state = tables.state(player_pos)
+                next_state = tables.next_state[state, action]
+                caught = swarm.occupied[next_state]
+                if recorder is not None:
+                    if caught:
+                        recorder.write(PLAYER, state, action, MONSTER_REWARD, tables.state(START_POS))
+                    else:
+                        recorder.write(PLAYER, state, action, tables.reward[state, action], next_state)
+                if caught:  # Walked into a monster: back to the start
+                    player_pos = START_POS.copy()
+                elif next_state != state:  # Only move if not a wall
+                    player_pos = tables.pos(next_state)
                     if start_time is None:  # Start timer on first move
                         start_time = time.time()
 
             # Handle "Next" and "Back" button click after game over
             if game_over and event.type == pygame.MOUSEBUTTONDOWN:
-                if NEXT_BUTTON.collidepoint(event.pos):
-                    maze_size = 16 if current_mode in ["Medium", "Blackout"] else 10
-                    maze = generate_maze(size=maze_size)
-                    player_pos = START_POS.copy()
-                    ai_pos = START_POS.copy()
-                    goal_pos = [maze_size - 2, maze_size - 2]
-                    q_table = np.zeros((maze_size, maze_size, len(ACTIONS)))
+                if pygame.Rect(NEXT_BUTTON).collidepoint(event.pos):
+                    new_maze()
                     start_time = None
                     elapsed_time = 0
                     game_over = False
                     winner = None
                     episodes += 1
                     print(f"Generated new {maze_size}x{maze_size} maze for Episode {episodes + 1}")
-                if BACK_BUTTON.collidepoint(event.pos):
-                    difficulty_select()
-
-        # AI movement (Q-learning)
-        if not game_over:
-            # Choose action: explore or exploit
-            if random.uniform(0, 1) < exploration_rate:
-                action = random.choice(ACTIONS)
-            else:
-                action = ACTIONS[np.argmax(q_table[ai_pos[1]][ai_pos[0]])]
-
-            # Update Q-table and move AI
-            next_pos = get_next_pos(ai_pos, action)
-            reward = get_reward(next_pos)
-            old_q = q_table[ai_pos[1]][ai_pos[0]][ACTIONS.index(action)]
-            next_max_q = np.max(q_table[next_pos[1]][next_pos[0]])
-            new_q = old_q + LEARNING_RATE * (reward + DISCOUNT_FACTOR * next_max_q - old_q)
-            q_table[ai_pos[1]][ai_pos[0]][ACTIONS.index(action)] = new_q
-
-            if maze[next_pos[1]][next_pos[0]] == 0:  # Only move if not a wall
-                ai_pos = next_pos
-                if start_time is None:  # Start timer on first move
-                    start_time = time.time()
-
-            # Decay exploration rate
-            exploration_rate = max(MIN_EXPLORATION_RATE, exploration_rate * EXPLORATION_DECAY)
+                if pygame.Rect(BACK_BUTTON).collidepoint(event.pos):
+                    return "difficulty_select"
+
+        frame_timer.mark("events")
+
+        # AI movement (Q-learning), at AI_TICK_RATE steps per second whatever the frame rate
+        ai_ticks = ai_clock.due()
+        if not game_over and player_pos != goal_pos:
+            for _ in range(ai_ticks):
+                if len(swarm.states) or len(swarm.monsters):
+                    swarm.step()
+                    # Monsters catch whoever they land on
+                    if swarm.occupied[tables.state(player_pos)]:
+                        player_pos = send_to_start(PLAYER, player_pos)
+                    if swarm.occupied[tables.state(ai_pos)]:
+                        ai_pos = send_to_start(AI, ai_pos)
+                ai_step()
+                if ai_pos == goal_pos or swarm.arrived:
+                    break
 
         # Update elapsed time
         if start_time is not None and not game_over:
             elapsed_time = time.time() - start_time
 
         # Check for winner: First to step on green box (goal_pos) wins
-        if not game_over and (player_pos == goal_pos or ai_pos == goal_pos):
+        # (any of the AI's extra agents counts for the AI)
+        if not game_over and (player_pos == goal_pos or ai_pos == goal_pos or swarm.arrived):
             game_over = True
             winner = "Player" if player_pos == goal_pos else "AI"
+            redraw_all = True
+            qtable_store.save(q_table)
+            if recorder is not None:
+                recorder.flush()
             print(f"Episode {episodes + 1}: {winner} Wins in {elapsed_time:.2f} seconds!")
+            if winner == "AI":
+                print(f"AI took {ai_steps} steps, {ai_steps - tables.optimal_steps(START_POS)} more than the shortest path")
 
-        # Draw game elements
-        screen.fill(WHITE)
-
-        #Stretch out the maze if in Easy to fill screen - Alex
-        bottom_margin = 60
-        if current_mode == "Easy":
-            draw_tile_size = min(WINDOW_WIDTH // maze_size, (WINDOW_HEIGHT - bottom_margin) // maze_size)
-        else:
-            draw_tile_size = TILE_SIZE
-
-
-
-        if current_mode == "Blackout":
-            # Blackout mode: render only 3x3 areas around player, AI, and goal
-            for y in range(maze_size):
-                for x in range(maze_size):
-                    # Check if tile is within 3x3 of player, AI, or goal
-                    is_visible = (
-                        (abs(x - player_pos[0]) <= 1 and abs(y - player_pos[1]) <= 1) or
-                        (abs(x - ai_pos[0]) <= 1 and abs(y - ai_pos[1]) <= 1) or
-                        (abs(x - goal_pos[0]) <= 1 and abs(y - goal_pos[1]) <= 1)
-                    )
-                    if is_visible and maze[y][x] == 1:
-                        pygame.draw.rect(screen, BLACK, (x * draw_tile_size, y * draw_tile_size, draw_tile_size, draw_tile_size))
-                    elif not is_visible:
-                        pygame.draw.rect(screen, BLACK, (x * draw_tile_size, y * draw_tile_size, draw_tile_size, draw_tile_size))
-        else:
-            # Normal rendering for Easy and Medium
-            for y in range(maze_size):
-                for x in range(maze_size):
-                    if maze[y][x] == 1:
-                        pygame.draw.rect(screen, BLACK, (x * draw_tile_size, y * draw_tile_size, draw_tile_size, draw_tile_size))
-
-        # Draw goal (green box), player (blue), and AI (red)
-        pygame.draw.rect(screen, GREEN, (goal_pos[0] * draw_tile_size, goal_pos[1] * draw_tile_size, draw_tile_size, draw_tile_size))
-        pygame.draw.rect(screen, BLUE, (player_pos[0] * draw_tile_size, player_pos[1] * draw_tile_size, draw_tile_size, draw_tile_size))
-        pygame.draw.rect(screen, RED, (ai_pos[0] * draw_tile_size, ai_pos[1] * draw_tile_size, draw_tile_size, draw_tile_size))
-
-        # Draw border around maze - Alex
-        maze_pixel_width = maze_size * draw_tile_size
-        maze_pixel_height = maze_size * draw_tile_size
-        pygame.draw.rect(screen, BLACK, (0, 0, maze_pixel_width, maze_pixel_height), 4)
-
-        #Draw Debug Info when Enabled
-        if debug_mode:
-            #Show Player position, AI position, and Steps with episode number
-            playerPos = FONT.render(f"Player: {player_pos}", True, RED)
-            aiPos = FONT.render(f"AI: {ai_pos}", True, RED)
-            steps = FONT.render(f"Steps (Episode {episodes+1}): {elapsed_time:.2f}s", True, RED)
-
-            screen.blit(playerPos, (WINDOW_WIDTH - 200, 10))
-            screen.blit(aiPos, (WINDOW_WIDTH - 200, 30))
-            screen.blit(steps, (WINDOW_WIDTH - 200, 50))
-
-            #Draw blue box around goal
-            pygame.draw.rect(screen, BLUE, (goal_pos[0] * draw_tile_size, goal_pos[1] * draw_tile_size, draw_tile_size, draw_tile_size), 2)
-
-        # Display timer and episode number
-        if not game_over:
-            QUITBUTTON.changeColor(pygame.mouse.get_pos())
-            QUITBUTTON.update(screen)
-        
-        timer_text = FONT.render(f"Time: {elapsed_time:.2f}s", True, BLACK)
-        screen.blit(timer_text, (10, WINDOW_HEIGHT - 40))
-        maze_text = FONT.render(f"Episode {episodes + 1}", True, BLACK)
-        screen.blit(maze_text, (10, 10))
-
-        # Victory screen when someone wins
-        if game_over:
-            # Draw semi-transparent overlay
-            overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
-            overlay.set_alpha(128)
-            overlay.fill(GRAY)
-            screen.blit(overlay, (0, 0))
-
-            # Display winner - emphasize green box as win condition
-            winner_color = BLUE if winner == "Player" else RED
-            winner_text = WINNER_FONT.render(f"{winner} Reached", True, winner_color)
-            goal_text = FONT.render("the Green Box First!", True, GREEN)
-            time_text = FONT.render(f"Time: {elapsed_time:.2f}s", True, WHITE)
-            
-            winner_rect = winner_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 - 60))
-            goal_rect = goal_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2))
-            time_rect = time_text.get_rect(center=(WINDOW_WIDTH // 2, WINDOW_HEIGHT // 2 + 60))
-            
-            screen.blit(winner_text, winner_rect)
-            screen.blit(goal_text, goal_rect)
-            screen.blit(time_text, time_rect)
-
-            # Draw Next button
-            pygame.draw.rect(screen, YELLOW, NEXT_BUTTON)
-            next_text = FONT.render("Next", True, BLACK)
-            next_rect = next_text.get_rect(center=NEXT_BUTTON.center)
-            screen.blit(next_text, next_rect)
-
-            # Draw Back button
-            pygame.draw.rect(screen, BLACK, BACK_BUTTON)
-            back_text = FONT.render("Back", True, WHITE)
-            back_rect = next_text.get_rect(center=BACK_BUTTON.center)
-            screen.blit(back_text, back_rect)
-
-        # Update display and control frame rate
-        pygame.display.flip()
-        clock.tick(FPS)
+        frame_timer.mark("ai")
 
-BG = pygame.image.load("assets/Background.png")
-SCREEN = pygame.display.set_mode((500,600))
-def get_font(size):
-    return pygame.font.Font("assets/font.ttf", size)
+        draw_frame()
 
-def main_menu():
-    while True:
-        SCREEN.blit(BG, (0, 0))
+BG = None      # Menu background, loaded by the first menu shown
+SCREEN = None  # Menu window
 
-        MENU_MOUSE_POS = pygame.mouse.get_pos()
+class MenuScene(Scene):
+    """A menu screen: redrawn only when there is input, at most MENU_FPS times a second"""
+    idle = True
 
-        MENU_TEXT = get_font(60).render("M-AI-ZE", True, "#ffffff")
-        MENU_RECT = MENU_TEXT.get_rect(center=(250, 75))
+    @property
+    def fps(self):
+        return MENU_FPS
+
+    def enter(self):
+        global BG, SCREEN
+        if SCREEN is None:
+            SCREEN = pygame.display.set_mode((500,600))
+            BG = load_image("assets/Background.png", convert=True)
+        if not hasattr(self, "buttons"):
+            self.buttons = self.make_buttons()
 
-        PLAY_BUTTON = Button(image=pygame.image.load("assets/PlayRect.png"), pos=(250, 250), 
+class MainMenu(MenuScene):
+    def make_buttons(self):
+        PLAY_BUTTON = Button(image=load_image("assets/PlayRect.png"), pos=(250, 250), 
                             text_input="PLAY", font=get_font(40), base_color="#d7fcd4", hovering_color="White")
-        QUIT_BUTTON = Button(image=pygame.image.load("assets/QuitRect.png"), pos=(250, 350), 
+        QUIT_BUTTON = Button(image=load_image("assets/QuitRect.png"), pos=(250, 350), 
                             text_input="QUIT", font=get_font(40), base_color="#d7fcd4", hovering_color="White")
+        return [PLAY_BUTTON, QUIT_BUTTON]
+
+    def frame(self, events):
+        PLAY_BUTTON, QUIT_BUTTON = self.buttons
+        SCREEN.blit(BG, (0, 0))
+
+        MENU_MOUSE_POS = pygame.mouse.get_pos()
+
+        MENU_TEXT = render_text("M-AI-ZE", 60, "#ffffff")
+        MENU_RECT = MENU_TEXT.get_rect(center=(250, 75))
 
         SCREEN.blit(MENU_TEXT, MENU_RECT)
 
-        for button in [PLAY_BUTTON, QUIT_BUTTON]:
+        for button in self.buttons:
             button.changeColor(MENU_MOUSE_POS)
             button.update(SCREEN)
         
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+                return EXIT
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if PLAY_BUTTON.checkForInput(MENU_MOUSE_POS):
-                    game_rules()
+                    return "game_rules"
                 if QUIT_BUTTON.checkForInput(MENU_MOUSE_POS):
-                    pygame.quit()
-                    sys.exit()
+                    return EXIT
 
         pygame.display.update()
 
-def game_rules():
-    while True:
+class GameRules(MenuScene):
+    def make_buttons(self):
+        # Continue button
+        CONTINUE_BUTTON = Button(image=load_image("assets/PlayRect.png"), pos=(250, 450), 
+                            text_input="continue", font=get_font(30), base_color="#d7fcd4", hovering_color="White")
+        return [CONTINUE_BUTTON]
+
+    def frame(self, events):
+        CONTINUE_BUTTON = self.buttons[0]
         SCREEN.blit(BG, (0, 0))
 
         RULES_MOUSE_POS = pygame.mouse.get_pos()
 
-        TITLE_TEXT = get_font(40).render("Game Rules", True, "#ffffff")
+        TITLE_TEXT = render_text("Game Rules", 40, "#ffffff")
         TITLE_RECT = TITLE_TEXT.get_rect(center=(250, 75))
 
         # Text displaying rules
         rules = "You BLUE player must reach the"
         rulesCont = "GREEN goal before the RED AI!"
 
-        RULES_TEXT = get_font(15).render(rules, True, "#ffffff")
+        RULES_TEXT = render_text(rules, 15, "#ffffff")
         RULES_RECT = RULES_TEXT.get_rect(center=(250, 150))
 
-        RULESCONT_TEXT = get_font(15).render(rulesCont, True, "#ffffff")
+        RULESCONT_TEXT = render_text(rulesCont, 15, "#ffffff")
         RULESCONT_RECT = RULESCONT_TEXT.get_rect(center=(250, 200))
 
-        # Continue button
-        CONTINUE_BUTTON = Button(image=pygame.image.load("assets/PlayRect.png"), pos=(250, 450), 
-                            text_input="continue", font=get_font(30), base_color="#d7fcd4", hovering_color="White")
-        
         SCREEN.blit(TITLE_TEXT, TITLE_RECT)
         SCREEN.blit(RULES_TEXT, RULES_RECT)
         SCREEN.blit(RULESCONT_TEXT, RULESCONT_RECT)
 
 
-        for button in [CONTINUE_BUTTON]:
+        for button in self.buttons:
             button.changeColor(RULES_MOUSE_POS)
             button.update(SCREEN)
 
         # Choices player can make
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+                return EXIT
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if CONTINUE_BUTTON.checkForInput(RULES_MOUSE_POS):
-                    difficulty_select()
+                    return "difficulty_select"
         pygame.display.update()
 
-def difficulty_select():
-    global maze, player_pos, ai_pos, episodes, maze_size, goal_pos, q_table, current_mode, winner
-    Difficulty_image = pygame.image.load('assets/Difficulty.png').convert()
-    
-    while True:
-        SCREEN.blit(Difficulty_image, (0, 0))
-        DIFFICULTY_SELECT_MOUSE_POS = pygame.mouse.get_pos()
+class DifficultySelect(MenuScene):
+    # Mode picked by each button, in make_buttons order after BACK
+    MODES = ["Easy", "Medium", "Blackout"]
 
-        DIFFICULTY_SELECT_TEXT = get_font(28).render("SELECT DIFFICULTY", True, "White")
-        DIFFICULTY_SELECT_RECT = DIFFICULTY_SELECT_TEXT.get_rect(center=(250, 100))
-        SCREEN.blit(DIFFICULTY_SELECT_TEXT, DIFFICULTY_SELECT_RECT)
+    def enter(self):
+        super().enter()
+        prefetcher.want(*MAZE_SIZES)  # Have mazes ready by the time one is picked
 
+    def make_buttons(self):
+        self.Difficulty_image = load_image('assets/Difficulty.png', convert=True)
         DIFFICULTY_SELECT_BACK = Button(image=None, pos=(250, 750), 
                                        text_input="BACK", font=get_font(35), 
                                        base_color="Black", hovering_color="Green")
-        EASY_BUTTON = Button(image=pygame.image.load("assets/PlayRect.png"), pos=(250, 200), 
+        EASY_BUTTON = Button(image=load_image("assets/PlayRect.png"), pos=(250, 200), 
                             text_input="Easy", font=get_font(25), base_color="#d7fcd4", hovering_color="White")
-        MEDIUM_BUTTON = Button(image=pygame.image.load("assets/PlayRect.png"), pos=(250, 350), 
+        MEDIUM_BUTTON = Button(image=load_image("assets/PlayRect.png"), pos=(250, 350), 
                               text_input="Medium", font=get_font(25), base_color="#d7fcd4", hovering_color="White")
-        BLACKOUT_BUTTON = Button(image=pygame.image.load("assets/PlayRect.png"), pos=(250, 500), 
+        BLACKOUT_BUTTON = Button(image=load_image("assets/PlayRect.png"), pos=(250, 500), 
                                 text_input="Blackout", font=get_font(25), base_color="#d7fcd4", hovering_color="White")
+        return [DIFFICULTY_SELECT_BACK, EASY_BUTTON, MEDIUM_BUTTON, BLACKOUT_BUTTON]
+
+    def frame(self, events):
+        global episodes, current_mode
+        DIFFICULTY_SELECT_BACK = self.buttons[0]
+        SCREEN.blit(self.Difficulty_image, (0, 0))
+        DIFFICULTY_SELECT_MOUSE_POS = pygame.mouse.get_pos()
 
-        for button in [DIFFICULTY_SELECT_BACK, EASY_BUTTON, MEDIUM_BUTTON, BLACKOUT_BUTTON]:
+        DIFFICULTY_SELECT_TEXT = render_text("SELECT DIFFICULTY", 28, "White")
+        DIFFICULTY_SELECT_RECT = DIFFICULTY_SELECT_TEXT.get_rect(center=(250, 100))
+        SCREEN.blit(DIFFICULTY_SELECT_TEXT, DIFFICULTY_SELECT_RECT)
+
+        for button in self.buttons:
             button.changeColor(DIFFICULTY_SELECT_MOUSE_POS)
             button.update(SCREEN)
 
-        for event in pygame.event.get():
+        for event in events:
             if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+                return EXIT
             if event.type == pygame.MOUSEBUTTONDOWN:
                 if DIFFICULTY_SELECT_BACK.checkForInput(DIFFICULTY_SELECT_MOUSE_POS):
-                    main_menu()
-                if EASY_BUTTON.checkForInput(DIFFICULTY_SELECT_MOUSE_POS):
-                    maze_size = 10
-                    maze = generate_maze(size=maze_size)
-                    player_pos = START_POS.copy()
-                    ai_pos = START_POS.copy()
-                    goal_pos = [maze_size - 2, maze_size - 2]
-                    q_table = np.zeros((maze_size, maze_size, len(ACTIONS)))
-                    episodes = 0
-                    current_mode = "Easy"
-                    pygame.mixer.music.stop()
-                    game_loop()
-                if MEDIUM_BUTTON.checkForInput(DIFFICULTY_SELECT_MOUSE_POS):
-                    maze_size = 16
-                    maze = generate_maze(size=maze_size)
-                    player_pos = START_POS.copy()
-                    ai_pos = START_POS.copy()
-                    goal_pos = [maze_size - 2, maze_size - 2]
-                    q_table = np.zeros((maze_size, maze_size, len(ACTIONS)))
-                    episodes = 0
-                    current_mode = "Medium"
-                    pygame.mixer.music.stop()
-                    game_loop()
-                if BLACKOUT_BUTTON.checkForInput(DIFFICULTY_SELECT_MOUSE_POS):
-                    maze_size = 16
-                    maze = generate_maze(size=maze_size)
-                    player_pos = START_POS.copy()
-                    ai_pos = START_POS.copy()
-                    goal_pos = [maze_size - 2, maze_size - 2]
-                    q_table = np.zeros((maze_size, maze_size, len(ACTIONS)))
-                    episodes = 0
-                    current_mode = "Blackout"
-                    pygame.mixer.music.stop()
-                    game_loop()
+                    return "main_menu"
+                for mode, button in zip(self.MODES, self.buttons[1:]):
+                    if button.checkForInput(DIFFICULTY_SELECT_MOUSE_POS):
+                        current_mode = mode
+                        new_maze()
+                        episodes = 0
+                        pygame.mixer.music.stop()
+                        return "game"
 
         pygame.display.update()
 
-# Main game loop
-main_menu()
-
-# Cleanup
-pygame.quit()
-sys.exit()
+def main():
+    """Run the game from the main menu until the player quits"""
+    setup()
+    scenes = SceneManager({
+        "main_menu": MainMenu(),
+        "game_rules": GameRules(),
+        "difficulty_select": DifficultySelect(),
+        "game": GameScene(),
+    }, clock, MENU_IDLE_TIMEOUT)
+    scenes.run("main_menu")
+
+    # Cleanup
+    quit_game()
+
+if __name__ == "__main__":
+    main()
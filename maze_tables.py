@@ -0,0 +1,103 @@
+# maze_tables.py
+import numpy as np
+
+from config import (ACTION_DELTAS, DISCOUNT_FACTOR, GOAL_REWARD, MOVE_REWARD,
+                    REWARD_SHAPING, WALL_REWARD)
+
+
+class MazeTables():
+    """Per-maze transition and reward tables over integer states and actions.
+
+    Only open cells are states, numbered densely in row order: cells[state]
+    is the cell's y * size + x and index maps that back (-1 on walls). An
+    action is an index into ACTIONS, so one AI step is
+    next_state[state, action] and reward[state, action], and a Q-table is
+    just (n_states, len(ACTIONS)). Bumping into a wall or the maze edge
+    leaves the state unchanged.
+
+    distance[state] is the number of moves to the goal (-1 where the goal
+    can't be reached), found with one BFS per maze. It backs the optional
+    potential-based reward shaping and the optimal_action oracle.
+    """
+
+    def __init__(self, maze, goal_pos, shaping=REWARD_SHAPING):
+        grid = np.asarray(maze, dtype=np.uint8)
+        self.size = size = grid.shape[0]
+        self.cells = np.flatnonzero(grid.ravel() != 1).astype(np.int32)
+        self.n_states = len(self.cells)
+        self.index = np.full(size * size, -1, dtype=np.int32)
+        self.index[self.cells] = np.arange(self.n_states)
+        self.goal_state = self.state(goal_pos)
+
+        states = np.arange(self.n_states)
+        ys, xs = np.divmod(self.cells, size)
+        self.next_state = np.empty((self.n_states, len(ACTION_DELTAS)), dtype=np.int32)
+        self.reward = np.empty((self.n_states, len(ACTION_DELTAS)), dtype=np.float32)
+        for action, (dx, dy) in enumerate(ACTION_DELTAS):
+            # Same clamping as the player's arrow-key movement
+            next_xs = np.clip(xs + dx, 0, size - 1)
+            next_ys = np.clip(ys + dy, 0, size - 1)
+            hit_wall = grid[next_ys, next_xs] == 1
+            target = self.index[next_ys * size + next_xs]
+            self.next_state[:, action] = np.where(hit_wall, states, target)
+            self.reward[:, action] = np.where(
+                target == self.goal_state, GOAL_REWARD,
+                np.where(hit_wall, WALL_REWARD, MOVE_REWARD))
+
+        self.distance = self.distance_field()
+
+        # Oracle: the action that gets closest to the goal from each state
+        next_distance = self.distance[self.next_state]
+        next_distance[next_distance < 0] = self.n_states  # Unreachable: never best
+        self.optimal_action = next_distance.argmin(axis=1).astype(np.int8)
+
+        # Potential-based shaping, F = gamma * phi(s') - phi(s), with phi the
+        # discounted return of walking the shortest path to the goal. It
+        # leaves the optimal policy unchanged but rewards progress right away.
+        if shaping:
+            potential = self.potential()
+            self.reward += shaping * (DISCOUNT_FACTOR * potential[self.next_state] - potential[:, None])
+
+    def potential(self):
+        """Discounted return of the shortest path to the goal from each state"""
+        gamma = DISCOUNT_FACTOR
+        steps = self.distance.astype(np.float64)
+        # d - 1 moves at MOVE_REWARD, then GOAL_REWARD on the last one
+        potential = (MOVE_REWARD * (1 - gamma ** (steps - 1)) / (1 - gamma)
+                     + gamma ** (steps - 1) * GOAL_REWARD)
+        potential[self.distance == 0] = 0.0  # The goal ends the race
+        potential[self.distance < 0] = MOVE_REWARD / (1 - gamma)  # Wandering forever
+        return potential.astype(np.float32)
+
+    def distance_field(self):
+        """Moves from each state to the goal by BFS over next_state; -1 if unreachable"""
+        distance = np.full(self.n_states, -1, dtype=np.int32)
+        distance[self.goal_state] = 0
+        frontier = np.array([self.goal_state])
+        steps = 0
+        while frontier.size:
+            steps += 1
+            # Moves are reversible, so the neighbors reached from the frontier
+            # are exactly the states one move further from the goal
+            neighbors = self.next_state[frontier].ravel()
+            frontier = neighbors[distance[neighbors] < 0]
+            distance[frontier] = steps
+        return distance
+
+    def state(self, pos):
+        """State id of an [x, y] position (-1 on a wall)"""
+        return int(self.index[pos[1] * self.size + pos[0]])
+
+    def pos(self, state):
+        """[x, y] position of a state id"""
+        y, x = divmod(int(self.cells[state]), self.size)
+        return [x, y]
+
+    def positions(self, states):
+        """[x, y] positions of an array of state ids, as an (n, 2) array"""
+        ys, xs = np.divmod(self.cells[states], self.size)
+        return np.stack([xs, ys], axis=1)
+
+    def optimal_steps(self, pos):
+        """Fewest moves from an [x, y] position to the goal, or -1 if unreachable"""
+        return int(self.distance[self.state(pos)])
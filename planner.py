@@ -0,0 +1,80 @@
+# planner.py
+import heapq
+from collections import defaultdict
+
+import numpy as np
+
+from config import ACTIONS, DISCOUNT_FACTOR, LEARNING_RATE
+
+
+class PrioritizedSweeping():
+    """Dyna-Q planning ordered by TD error (prioritized sweeping).
+
+    Remembers every (state, action) -> (reward, next_state) transition the
+    agent has really taken. After each real step, observe() runs up to
+    planning_steps extra Q-updates on remembered transitions, largest TD
+    error first, and queues the transitions leading into each updated state
+    so value spreads backwards from the goal. Works on the same q_table as
+    the real steps.
+
+    queued holds the priority each (state, action) is queued with (0 if
+    not queued). A transition is only pushed again with a higher priority,
+    and heap entries that no longer match queued are skipped when popped,
+    so the heap stays within a few entries per (state, action).
+    """
+
+    def __init__(self, tables, q_table, planning_steps=20, threshold=1e-3):
+        self.q = q_table.reshape(tables.n_states, len(ACTIONS))  # One row per state
+        self.planning_steps = planning_steps
+        self.threshold = threshold
+        self.reward = np.zeros(self.q.shape, dtype=np.float32)
+        self.next_state = np.full(self.q.shape, -1, dtype=np.int32)  # -1: never taken
+        self.predecessors = defaultdict(set)  # next_state -> {(state, action)}
+        self.queue = []  # Max-heap of (-priority, state, action)
+        self.queued = np.zeros(self.q.shape)  # Priority in the queue, 0 if not queued
+
+    def td_error(self, state, action):
+        target = self.reward[state, action] + DISCOUNT_FACTOR * self.q[self.next_state[state, action]].max()
+        return target - self.q[state, action]
+
+    def push(self, state, action):
+        """Queue a remembered transition if its TD error is worth planning on"""
+        priority = float(abs(self.td_error(state, action)))
+        if priority > self.threshold and priority > self.queued[state, action]:
+            self.queued[state, action] = priority
+            heapq.heappush(self.queue, (-priority, state, action))
+            if len(self.queue) > 4 * self.q.size:
+                # Mostly superseded entries by now: keep only the live ones
+                self.queue = [entry for entry in self.queue if -entry[0] == self.queued[entry[1], entry[2]]]
+                heapq.heapify(self.queue)
+
+    def pop(self):
+        """Highest-priority queued (state, action), or None if the queue is empty"""
+        while self.queue:
+            priority, state, action = heapq.heappop(self.queue)
+            if -priority == self.queued[state, action]:  # Not superseded
+                self.queued[state, action] = 0.0
+                return state, action
+        return None
+
+    def observe(self, state, action, reward, next_state):
+        """Remember a real transition, then run the planning updates"""
+        self.reward[state, action] = reward
+        self.next_state[state, action] = next_state
+        self.predecessors[next_state].add((state, action))
+        self.push(state, action)
+        for predecessor in self.predecessors[state]:
+            self.push(*predecessor)
+
+        for _ in range(self.planning_steps):
+            entry = self.pop()
+            if entry is None:
+                break
+            state, action = entry
+            # Entries can be stale; recompute rather than trust the queued priority
+            error = self.td_error(state, action)
+            if abs(error) <= self.threshold:
+                continue
+            self.q[state, action] += LEARNING_RATE * error
+            for predecessor in self.predecessors[state]:
+                self.push(*predecessor)
@@ -0,0 +1,141 @@
+# prefetch.py
+import random
+import threading
+from collections import deque, namedtuple
+
+from config import MAZE_SIZES, PRETRAIN_ENVS, PRETRAIN_MODES, PRETRAIN_STEPS, START_POS
+from generator import generate_maze
+from maze_tables import MazeTables
+from trainer import train_q_table
+
+# Seeds of different modes start this far apart, so modes of the same size
+# don't play the same mazes
+MODE_SEED_STRIDE = 1 << 20
+
+
+def mode_seed(base_seed, mode, k):
+    """Seed of the k-th maze (from 0) a session with base_seed plays in mode"""
+    return base_seed + list(MAZE_SIZES).index(mode) * MODE_SEED_STRIDE + k
+
+# A ready-to-play maze. q_table is its pre-trained table (None if not
+# pre-trained) until open_stored() swaps in the stored one; pretrained says
+# whether q_table holds pre-training done here.
+PreparedMaze = namedtuple("PreparedMaze", ["mode", "seed", "maze", "goal_pos", "tables", "q_table", "pretrained"])
+
+
+def prepare_maze(mode, seed, pretrain=None, store=None):
+    """Generate the seeded maze for mode with its tables, pre-training in memory.
+
+    Nothing is written to store: it's only checked, so mazes that already
+    have a stored table skip pre-training. open_stored() attaches the
+    stored table once the maze is actually played.
+    """
+    if pretrain is None:
+        pretrain = mode in PRETRAIN_MODES
+    size = MAZE_SIZES[mode]
+    maze = generate_maze(size=size, seed=seed)
+    goal_pos = [size - 2, size - 2]
+    tables = MazeTables(maze, goal_pos)
+    pretrained = pretrain and not (store is not None and store.exists(maze, mode))
+    q_table = None
+    if pretrained:
+        q_table = train_q_table(tables, START_POS, n_envs=PRETRAIN_ENVS, steps=PRETRAIN_STEPS, seed=seed)
+    return PreparedMaze(mode, seed, maze, goal_pos, tables, q_table, pretrained)
+
+
+def open_stored(prepared, store, warm_start=False):
+    """prepared with its Q-table opened from store (see QTableStore.load).
+
+    A newly created table takes the pre-trained values, if any (over any
+    warm start); a stored one is kept as it is, so pre-training never
+    replaces what was learned before.
+    """
+    q_table, fresh = store.load(prepared.maze, prepared.mode, warm_start=warm_start)
+    pretrained = prepared.pretrained and fresh
+    if pretrained:
+        q_table[:] = prepared.q_table
+        store.save(q_table)
+    return prepared._replace(q_table=q_table, pretrained=pretrained)
+
+
+class MazePrefetcher():
+    """Background worker keeping a few prepared mazes ready per mode.
+
+    A mode's mazes use seeds mode_seed(base_seed, mode, k) for k = 0, 1,
+    2, ... and come out of get() in that order, so a session is
+    reproducible from base_seed. A mode's queue is only filled
+    once get() has asked for it, and is topped back up to depth after each
+    get(). Mazes are prepared with store as in prepare_maze, so nothing is
+    stored for mazes that are never played.
+    If preparing one fails the worker stops and get() raises the error.
+    """
+
+    def __init__(self, depth=2, base_seed=None, store=None):
+        self.depth = depth
+        self.base_seed = random.randrange(2 ** 32) if base_seed is None else base_seed
+        self.store = store
+        self.ready = {mode: deque() for mode in MAZE_SIZES}
+        self.next_seed = {mode: mode_seed(self.base_seed, mode, 0) for mode in MAZE_SIZES}
+        self.active = set()
+        self.closed = False
+        self.error = None  # Exception that stopped the worker
+        self.changed = threading.Condition()
+        self.worker = threading.Thread(target=self.run, name="maze-prefetch", daemon=True)
+        self.worker.start()
+
+    def want(self, *modes):
+        """Start filling the queues for modes without waiting for them"""
+        with self.changed:
+            self.active.update(modes)
+            self.changed.notify_all()
+
+    def get(self, mode):
+        """Next prepared maze for mode, waiting only if none is ready yet"""
+        self.want(mode)
+        with self.changed:
+            while not self.ready[mode]:
+                if self.error is not None:
+                    raise self.error
+                if self.closed:
+                    raise RuntimeError("MazePrefetcher is closed")
+                self.changed.wait()
+            prepared = self.ready[mode].popleft()
+            self.changed.notify_all()  # Room to refill
+            return prepared
+
+    def close(self):
+        """Stop the worker after the maze it is preparing, if any"""
+        with self.changed:
+            self.closed = True
+            self.changed.notify_all()
+        self.worker.join()
+
+    def wanted(self):
+        """Active mode with the fewest ready mazes, if any is below depth"""
+        short = [mode for mode in sorted(self.active) if len(self.ready[mode]) < self.depth]
+        return min(short, key=lambda mode: len(self.ready[mode])) if short else None
+
+    def run(self):
+        while True:
+            with self.changed:
+                while not self.closed and self.wanted() is None:
+                    self.changed.wait()
+                if self.closed:
+                    return
+                mode = self.wanted()
+                seed = self.next_seed[mode]
+                self.next_seed[mode] += 1
+
+            # Build outside the lock so get() can hand out ready mazes meanwhile
+            try:
+                prepared = prepare_maze(mode, seed, store=self.store)
+            except Exception as error:
+                # Hand the error to get() rather than leave it waiting forever
+                with self.changed:
+                    self.error = error
+                    self.changed.notify_all()
+                return
+
+            with self.changed:
+                self.ready[mode].append(prepared)
+                self.changed.notify_all()
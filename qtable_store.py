@@ -0,0 +1,104 @@
+# qtable_store.py
+import hashlib
+import os
+
+import numpy as np
+
+from config import ACTIONS, Q_DTYPE
+
+
+def maze_fingerprint(maze):
+    """Short hex digest identifying a maze layout"""
+    grid = np.ascontiguousarray(maze, dtype=np.uint8)
+    return hashlib.sha1(grid.tobytes()).hexdigest()[:16]
+
+
+class QTableStore():
+    """Q-tables kept as .npy files on disk and opened with np.memmap.
+
+    Tables are keyed by mode and maze fingerprint, so learning survives Next,
+    mode changes and restarts. Loading maps the file instead of reading it,
+    and writes to the table go straight to the mapped pages, so saving only
+    flushes what changed. A table has one row per open cell, in MazeTables
+    state order; the cells themselves go in a .cells.npy file next to it.
+    """
+
+    def __init__(self, directory, dtype=Q_DTYPE):
+        self.directory = directory
+        self.dtype = np.dtype(dtype)
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, mode, size, fingerprint):
+        return os.path.join(self.directory, f"{mode}-{size}-{fingerprint}.npy")
+
+    def cells_path(self, path):
+        """Where the open cells (y * size + x) of the table at path are kept"""
+        return path[:-len(".npy")] + ".cells.npy"
+
+    def exists(self, maze, mode):
+        """Whether a table for this maze and mode is stored; creates nothing"""
+        grid = np.asarray(maze, dtype=np.uint8)
+        path = self.path(mode, grid.shape[0], maze_fingerprint(grid))
+        return os.path.exists(path) and os.path.exists(self.cells_path(path))
+
+    def load(self, maze, mode, warm_start=False):
+        """Open the Q-table for this maze and mode, creating it if needed.
+
+        Returns (q_table, fresh), fresh being True if the table was just
+        created rather than loaded.
+
+        A new table starts at zero, or with warm_start copies the rows of the
+        cells also open at the same position in the stored table for this
+        mode whose maze size is closest. Tables stored in another layout or
+        dtype are started over.
+        """
+        grid = np.asarray(maze, dtype=np.uint8)
+        size = grid.shape[0]
+        cells = np.flatnonzero(grid.ravel() != 1).astype(np.int32)
+        shape = (len(cells), len(ACTIONS))
+        path = self.path(mode, size, maze_fingerprint(grid))
+        if os.path.exists(path) and os.path.exists(self.cells_path(path)):
+            q_table = np.load(path, mmap_mode="r+")
+            if q_table.shape == shape and q_table.dtype == self.dtype:
+                return q_table, False
+            del q_table
+
+        nearest = self.nearest(mode, size) if warm_start else None
+        q_table = np.lib.format.open_memmap(path, mode="w+", dtype=self.dtype, shape=shape)
+        np.save(self.cells_path(path), cells)
+        if nearest is not None:
+            source = np.load(nearest, mmap_mode="r")
+            source_size = int(os.path.basename(nearest).split("-")[1])
+            source_ys, source_xs = np.divmod(np.load(self.cells_path(nearest)), source_size)
+            # Row of each source cell in the new table, -1 where it's a wall or off the maze
+            index = np.full(size * size, -1, dtype=np.int32)
+            index[cells] = np.arange(len(cells))
+            inside = (source_xs < size) & (source_ys < size)
+            rows = np.full(len(source_xs), -1, dtype=np.int32)
+            rows[inside] = index[source_ys[inside] * size + source_xs[inside]]
+            q_table[rows[rows >= 0]] = source[rows >= 0]
+        return q_table, True
+
+    def nearest(self, mode, size):
+        """Path of the stored table for mode with the closest maze size, or None.
+
+        Ties go to the most recently written table.
+        """
+        best, best_key = None, None
+        for name in os.listdir(self.directory):
+            parts = name[:-len(".npy")].split("-")
+            if not name.endswith(".npy") or len(parts) != 3 or parts[0] != mode:
+                continue
+            path = os.path.join(self.directory, name)
+            # Skips the .cells.npy files, and tables from before they existed
+            if name.endswith(".cells.npy") or not os.path.exists(self.cells_path(path)):
+                continue
+            key = (abs(int(parts[1]) - size), -os.path.getmtime(path))
+            if best_key is None or key < best_key:
+                best, best_key = path, key
+        return best
+
+    def save(self, q_table):
+        """Flush a table opened by load back to its file"""
+        if isinstance(q_table, np.memmap):
+            q_table.flush()
@@ -0,0 +1,137 @@
+# recorder.py
+import os
+import struct
+import time
+
+import numpy as np
+
+from config import ACTIONS, DISCOUNT_FACTOR, LEARNING_RATE, Q_DTYPE
+
+# Who made a move
+PLAYER = 0
+AI = 1
+
+# Action of a record for an agent moved without acting (a monster caught
+# it and sent it from state back to the start); not an index into ACTIONS
+RESET = 255
+
+# One fixed-width record per move, little-endian, 20 bytes
+RECORD = np.dtype([
+    ("time_ms", "<u4"),     # Since the recording started
+    ("agent", "u1"),        # PLAYER or AI
+    ("action", "u1"),       # Index into ACTIONS, or RESET
+    ("pad", "<u2"),         # Keeps the fields after it 4-byte aligned
+    ("reward", "<f4"),      # As learned from, shaping included
+    ("state", "<u4"),       # Open-cell state id, as in MazeTables
+    ("next_state", "<u4"),  # Where the agent ended up (the start if a monster caught it)
+])
+
+# File header: magic, version, maze size, start x/y, goal x/y, then the maze
+# as size * size bytes (1 = wall) so a log can be replayed on its own
+MAGIC = b"MZTR"
+VERSION = 3  # 2: states are open-cell ids rather than y * size + x; 3: float rewards
+HEADER = struct.Struct("<4sHHHHHH")
+
+
+class TrajectoryWriter():
+    """Streams move records to a binary log, writing them out chunk_size at a time"""
+
+    def __init__(self, path, maze, start_pos, goal_pos, chunk_size=4096):
+        grid = np.ascontiguousarray(maze, dtype=np.uint8)
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, grid.shape[0], *start_pos, *goal_pos))
+        self.file.write(grid.tobytes())
+        self.chunk = np.zeros(chunk_size, dtype=RECORD)
+        self.count = 0
+        self.started = time.perf_counter()
+
+    def write(self, agent, state, action, reward, next_state):
+        """Record one move"""
+        record = self.chunk[self.count]
+        record["time_ms"] = int((time.perf_counter() - self.started) * 1000)
+        record["agent"] = agent
+        record["action"] = action
+        record["reward"] = reward
+        record["state"] = state
+        record["next_state"] = next_state
+        self.count += 1
+        if self.count == len(self.chunk):
+            self.flush()
+
+    def flush(self):
+        """Write buffered records to the file"""
+        self.file.write(self.chunk[:self.count].tobytes())
+        self.file.flush()
+        self.count = 0
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+
+class TrajectoryReader():
+    """Memory-mapped view of a log written by TrajectoryWriter.
+
+    records is a NumPy structured array (fields as in RECORD) backed by the
+    file, so even large logs open instantly.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            magic, version, size, start_x, start_y, goal_x, goal_y = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{path} is not a version {VERSION} trajectory log")
+            self.maze = np.frombuffer(f.read(size * size), dtype=np.uint8).reshape(size, size)
+        self.start_pos = [start_x, start_y]
+        self.goal_pos = [goal_x, goal_y]
+        # State ids number the open cells in row order, as in MazeTables
+        self.cells = np.flatnonzero(self.maze.ravel() != 1)
+        offset = HEADER.size + size * size
+        # np.memmap can't map an empty region
+        if os.path.getsize(path) > offset:
+            self.records = np.memmap(path, dtype=RECORD, mode="r", offset=offset)
+        else:
+            self.records = np.zeros(0, dtype=RECORD)
+
+    def replay(self):
+        """Re-run the match without rendering.
+
+        Yields (time_ms, player_state, ai_state) after every move and checks
+        each move starts where the previous one by that agent ended.
+        """
+        size = self.maze.shape[0]
+        start = int(np.searchsorted(self.cells, self.start_pos[1] * size + self.start_pos[0]))
+        positions = [start] * 2
+        for time_ms, agent, state, next_state in zip(self.records["time_ms"], self.records["agent"],
+                                                     self.records["state"], self.records["next_state"]):
+            if state != positions[agent]:
+                raise ValueError(f"move at {time_ms}ms starts at state {state}, expected {positions[agent]}")
+            positions[agent] = int(next_state)
+            yield int(time_ms), positions[PLAYER], positions[AI]
+
+
+def train_from_log(reader, q_table=None, epochs=10, agents=(PLAYER, AI)):
+    """Q-learning over every recorded move of the given agents, in batches.
+
+    Each epoch applies one Q-update per record at once (when records share
+    a state and action the last one wins), bootstrapping from the state the
+    agent really ended up in. RESET records aren't moves and are skipped. Player moves count too: Q-learning
+    learns the best policy from anyone's moves. Returns the
+    (n_states, len(ACTIONS)) q_table, updated in place if one is passed in.
+    """
+    if q_table is None:
+        q_table = np.zeros((len(reader.cells), len(ACTIONS)), dtype=Q_DTYPE)
+    q = q_table.reshape(len(reader.cells), len(ACTIONS))
+
+    records = reader.records[np.isin(reader.records["agent"], agents) & (reader.records["action"] != RESET)]
+    states = records["state"].astype(np.intp)
+    actions = records["action"].astype(np.intp)
+    rewards = records["reward"].astype(np.float64)
+    next_states = records["next_state"].astype(np.intp)
+
+    for _ in range(epochs):
+        target = rewards + DISCOUNT_FACTOR * q[next_states].max(axis=1)
+        q[states, actions] += LEARNING_RATE * (target - q[states, actions])
+    return q_table
+
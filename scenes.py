@@ -0,0 +1,56 @@
+# scenes.py
+import pygame
+
+EXIT = "exit"  # Scene name that ends SceneManager.run()
+
+
+class Scene():
+    """One screen of the game (a menu, the match).
+
+    The SceneManager calls enter() when switching to the scene, then
+    frame(events) once per pass of its loop with the events since the last
+    one. frame() returns the name of the scene to switch to, or None to
+    stay. An idle scene only changes in response to input, so the manager
+    waits for events instead of running it fps times a second.
+    """
+    fps = 60
+    idle = False
+
+    def enter(self):
+        pass
+
+    def frame(self, events):
+        return None
+
+    def tick(self, clock):
+        """Wait out the rest of the frame"""
+        clock.tick(self.fps)
+
+
+class SceneManager():
+    """Runs scenes one at a time from a single loop, so switching never nests calls"""
+
+    def __init__(self, scenes, clock, idle_timeout=500):
+        self.scenes = scenes
+        self.clock = clock
+        self.idle_timeout = idle_timeout  # ms an idle scene waits for input before redrawing anyway
+
+    def run(self, start):
+        """Run scenes from start until one switches to EXIT"""
+        scene = self.scenes[start]
+        scene.enter()
+        while True:
+            if scene.idle:
+                event = pygame.event.wait(self.idle_timeout)
+                events = [] if event.type == pygame.NOEVENT else [event]
+                events += pygame.event.get()
+            else:
+                events = pygame.event.get()
+
+            name = scene.frame(events)
+            if name == EXIT:
+                return
+            if name is not None:
+                scene = self.scenes[name]
+                scene.enter()
+            scene.tick(self.clock)
@@ -0,0 +1,37 @@
+# scheduler.py
+import time
+
+
+class FixedTimestep():
+    """Runs simulation ticks at a fixed rate, independent of the render frame rate.
+
+    Call due() once per rendered frame: it returns how many ticks have come
+    due since the last call, so a slow frame is followed by several ticks
+    and a fast one by none. At most max_ticks are returned per call; time
+    beyond that is dropped so the simulation can't fall further and further
+    behind.
+    """
+
+    def __init__(self, rate, max_ticks=1000, clock=time.perf_counter):
+        self.rate = rate
+        self.max_ticks = max_ticks
+        self.clock = clock
+        self.reset()
+
+    def reset(self):
+        """Start counting from now, discarding any time already owed"""
+        self.last = self.clock()
+        self.owed = 0.0
+
+    def due(self):
+        """Number of ticks to run before drawing the next frame"""
+        now = self.clock()
+        self.owed += (now - self.last) * self.rate
+        self.last = now
+        ticks = int(self.owed)
+        if ticks > self.max_ticks:
+            ticks = self.max_ticks
+            self.owed = 0.0
+        else:
+            self.owed -= ticks
+        return ticks
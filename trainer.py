@@ -0,0 +1,91 @@
+# trainer.py
+import random
+
+import numpy as np
+
+from config import (ACTIONS, DISCOUNT_FACTOR, EXPLORATION_DECAY, EXPLORATION_RATE,
+                    LEARNING_RATE, MIN_EXPLORATION_RATE, MONSTER_REWARD, Q_DTYPE, START_POS)
+
+
+def q_step(tables, q_table, state, exploration_rate, rng=random, oracle_rate=0.0, monsters=None):
+    """One epsilon-greedy Q-learning step for a single agent, as the game's AI takes it.
+
+    With probability oracle_rate the agent takes the maze's optimal action
+    instead (and still learns from it). monsters, a boolean array over
+    states, marks cells that cost MONSTER_REWARD to step on. Returns
+    (action, next_state, reward); q_table is updated in place.
+    """
+    q = q_table.reshape(tables.n_states, len(ACTIONS))  # One row per state
+
+    # Choose action id: oracle, explore or exploit
+    if oracle_rate and rng.random() < oracle_rate:
+        action = int(tables.optimal_action[state])
+    elif rng.random() < exploration_rate:
+        action = rng.randrange(len(ACTIONS))
+    else:
+        action = int(np.argmax(q[state]))
+
+    # Update Q-table
+    next_state = tables.next_state[state, action]
+    reward = tables.reward[state, action]
+    if monsters is not None and monsters[next_state]:
+        reward = MONSTER_REWARD
+    q[state, action] += LEARNING_RATE * (reward + DISCOUNT_FACTOR * q[next_state].max() - q[state, action])
+    return action, next_state, reward
+
+
+def train_q_table(tables, start_pos=START_POS, n_envs=256, steps=1000,
+                  q_table=None, exploration_rate=EXPLORATION_RATE, seed=None):
+    """Train a Q-table headlessly by stepping n_envs agents at once over one maze.
+
+    Uses the same rewards and update rule as the AI in game_loop, read from
+    the maze's MazeTables, but every agent is one slot in a NumPy array, so
+    each batched step performs n_envs Q-updates without any per-agent Python
+    code. Agents that reach the goal restart at start_pos. Returns the
+    (n_states, len(ACTIONS)) q_table, updated in place if one is passed in.
+    """
+    if q_table is None:
+        q_table = np.zeros((tables.n_states, len(ACTIONS)), dtype=Q_DTYPE)
+    q = q_table.reshape(tables.n_states, len(ACTIONS))  # View, one row per state
+    rng = np.random.default_rng(seed)
+    start_state = tables.state(start_pos)
+
+    # State of every agent
+    states = np.full(n_envs, start_state)
+
+    for _ in range(steps):
+        # Choose actions: explore or exploit, per agent
+        explore = rng.random(n_envs) < exploration_rate
+        actions = np.where(explore,
+                           rng.integers(0, len(ACTIONS), n_envs),
+                           q[states].argmax(axis=1))
+
+        next_states = tables.next_state[states, actions]
+        rewards = tables.reward[states, actions]
+
+        # Q-update; when several agents share a (state, action) the last one wins
+        old_q = q[states, actions]
+        next_max_q = q[next_states].max(axis=1)
+        q[states, actions] = old_q + LEARNING_RATE * (
+            rewards + DISCOUNT_FACTOR * next_max_q - old_q)
+
+        # Move; agents on the goal start over
+        states = np.where(next_states == tables.goal_state, start_state, next_states)
+
+        # Decay exploration rate once per batched step
+        exploration_rate = max(MIN_EXPLORATION_RATE, exploration_rate * EXPLORATION_DECAY)
+
+    return q_table
+
+
+def greedy_path_length(tables, q_table, start_pos=START_POS, max_steps=None):
+    """Steps the greedy policy of q_table takes from start_pos to the goal, or None if it never arrives"""
+    if max_steps is None:
+        max_steps = tables.n_states
+    q = q_table.reshape(tables.n_states, len(ACTIONS))
+    state = tables.state(start_pos)
+    for step in range(max_steps + 1):
+        if state == tables.goal_state:
+            return step
+        state = tables.next_state[state, q[state].argmax()]
+    return None
@@ -0,0 +1,75 @@
+# visibility.py
+import numpy as np
+
+
+class Visibility():
+    """Which maze tiles Blackout shows, kept up to date one mover at a time.
+
+    Every viewer (player, AI, goal) sees the square of tiles within radius
+    of it; with line_of_sight only those tiles whose straight line from the
+    viewer doesn't cross a wall (the wall itself still shows). counts holds
+    how many viewers see each tile, so moving one viewer only touches the
+    tiles around its old and new positions. mask is counts > 0.
+    """
+
+    def __init__(self, maze, radius=1, line_of_sight=False):
+        walls = np.asarray(maze, dtype=np.uint8) == 1
+        self.size = walls.shape[0]
+        self.radius = radius
+        self.line_of_sight = line_of_sight
+        # Padded by radius on every side so footprints never need clipping
+        self.walls = np.pad(walls, radius, constant_values=True)
+        self.counts = np.zeros(self.walls.shape, dtype=np.int16)
+        self.mask = self.counts[radius:-radius or None, radius:-radius or None] > 0
+        self.viewers = {}  # Viewer index -> position its footprint was added at
+
+        # For each tile in the square, the tiles strictly between it and the
+        # centre (padded with the centre, which is never a wall)
+        width = 2 * radius + 1
+        steps = max(radius - 1, 1)
+        self.line_x = np.full((width, width, steps), radius)
+        self.line_y = np.full((width, width, steps), radius)
+        for dy in range(-radius, radius + 1):
+            for dx in range(-radius, radius + 1):
+                distance = max(abs(dx), abs(dy))
+                for k in range(1, distance):
+                    self.line_x[dy + radius, dx + radius, k - 1] = radius + round(dx * k / distance)
+                    self.line_y[dy + radius, dx + radius, k - 1] = radius + round(dy * k / distance)
+
+    def footprint(self, pos):
+        """Boolean (2r+1, 2r+1) square of the tiles a viewer at pos sees"""
+        x, y = pos
+        width = 2 * self.radius + 1
+        if not self.line_of_sight:
+            return np.ones((width, width), dtype=bool)
+        around = self.walls[y:y + width, x:x + width]
+        return ~around[self.line_y, self.line_x].any(axis=2)
+
+    def _apply(self, pos, sign):
+        """Add (sign 1) or remove (sign -1) a viewer's footprint; returns the tile box it covers"""
+        x, y = pos
+        width = 2 * self.radius + 1
+        self.counts[y:y + width, x:x + width] += sign * self.footprint(pos)
+        x0, y0 = max(x - self.radius, 0), max(y - self.radius, 0)
+        x1, y1 = min(x + self.radius + 1, self.size), min(y + self.radius + 1, self.size)
+        r = self.radius
+        self.mask[y0:y1, x0:x1] = self.counts[y0 + r:y1 + r, x0 + r:x1 + r] > 0
+        return x0, y0, x1, y1
+
+    def update(self, positions):
+        """Move the viewers to positions (same order every call).
+
+        Returns (x0, y0, x1, y1) tile boxes, end-exclusive, outside which
+        the mask is unchanged.
+        """
+        changed = []
+        for viewer, pos in enumerate(positions):
+            pos = tuple(pos)
+            old = self.viewers.get(viewer)
+            if old == pos:
+                continue
+            if old is not None:
+                changed.append(self._apply(old, -1))
+            changed.append(self._apply(pos, 1))
+            self.viewers[viewer] = pos
+        return changed